@@ -0,0 +1,135 @@
+"""벤치마크용 합성 PR 데이터 생성기.
+
+같은 CorpusSpec(seed 포함)이면 항상 같은 데이터를 만든다. 결과는 Github REST API 응답과 같은 모양이라
+PullRequestParser.parse에 그대로 넣을 수 있다.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import pytz
+from configs import settings
+from utils import Roster
+
+# 보고서를 만드는 시각. 실행하는 날짜와 상관없이 같은 결과가 나오도록 고정하고, 올바른 타이틀은 그 전날 날짜를 사용한다
+REPORT_DATE = pytz.timezone('Asia/Seoul').localize(datetime(2023, 3, 21, 9))
+
+@dataclass
+class CorpusSpec:
+    pull_requests: int = 100
+    files_per_pr: int = 10
+    # 각 항목이 잘못된 값으로 만들어질 확률
+    invalid_title: float = 0.1
+    invalid_label: float = 0.1
+    invalid_path: float = 0.1
+    invalid_filename: float = 0.1
+    seed: int = 0
+    report_date: datetime = field(default=REPORT_DATE)
+    # True면 실제 REST API 응답처럼 head/base의 저장소 정보, _links, 파일의 patch(diff)까지 채운다
+    full_payloads: bool = False
+
+    def label(self) -> str:
+        return f"{self.pull_requests}x{self.files_per_pr}"
+
+    def title_date(self) -> datetime:
+        return self.report_date - timedelta(days=1)
+
+INVALID_TITLES = ["[Baekjoon]", "hello", "[Baekjoon] 20-01-01", "[baekjoon]23-03-20"]
+INVALID_FOLDERS = ["이상한폴더!", "dp", "tmp"]
+INVALID_FILENAMES = [
+    "1번상자_{name}.{ext}",
+    "통학의신+{name}.{ext}",
+    "통학의 신_{name}.{ext}",
+    "통학의신.{ext}",
+    "통학의신_{name}",
+    ".gitignore",
+    "{prefix}abc_{name}.{ext}",
+    "문제_{other}.{ext}",
+]
+
+def repository_payload(owner: str, name: str) -> Dict:
+    """REST API 응답의 head.repo / base.repo. 검사에는 쓰지 않지만 PR마다 몇 KB씩 차지한다"""
+    url = f"https://api.github.com/repos/{owner}/{name}"
+    return {
+        "id": 1, "node_id": "R_kgDOJ", "name": name, "full_name": f"{owner}/{name}", "private": False,
+        "owner": {"login": owner, "id": 1, "type": "Organization", "url": f"https://api.github.com/users/{owner}"},
+        "html_url": f"https://github.com/{owner}/{name}", "description": "알고리즘 스터디", "fork": False, "url": url,
+        **{f"{key}_url": f"{url}/{key}{{/sha}}" for key in (
+            "archive", "assignees", "blobs", "branches", "collaborators", "comments", "commits", "compare",
+            "contents", "contributors", "deployments", "downloads", "events", "forks", "git_commits", "git_refs",
+            "git_tags", "hooks", "issue_comment", "issue_events", "issues", "keys", "labels", "languages", "merges",
+            "milestones", "notifications", "pulls", "releases", "stargazers", "statuses", "subscribers",
+            "subscription", "tags", "teams", "trees"
+        )},
+        "created_at": "2023-02-27T00:00:00Z", "updated_at": "2023-03-20T00:00:00Z", "pushed_at": "2023-03-20T00:00:00Z",
+        "size": 1024, "stargazers_count": 10, "watchers_count": 10, "language": "Python", "forks_count": 12,
+        "open_issues_count": 30, "default_branch": "main", "visibility": "public", "topics": ["algorithm", "baekjoon"]
+    }
+
+def full_pull_request(pull_request: Dict, owner: str = "it-e-7", name: str = "Algorithm") -> Dict:
+    url = f"https://api.github.com/repos/{owner}/{name}/pulls/{pull_request['number']}"
+    user = pull_request["user"]["login"]
+    return {
+        **pull_request,
+        "url": url, "html_url": f"https://github.com/{owner}/{name}/pull/{pull_request['number']}", "state": "open",
+        "body": "풀이 제출합니다.\n" * 20, "draft": False,
+        "user": {**pull_request["user"], "id": 1, "type": "User", "avatar_url": f"https://avatars.githubusercontent.com/{user}"},
+        "head": {**pull_request["head"], "label": f"{user}:main", "ref": "main", "repo": repository_payload(user, name)},
+        "base": {"label": f"{owner}:main", "ref": "main", "sha": "0" * 40, "repo": repository_payload(owner, name)},
+        "_links": {key: {"href": f"{url}/{key}"} for key in ("self", "html", "issue", "comments", "review_comments", "commits", "statuses")},
+    }
+
+def full_file(file: Dict, number: int, k: int) -> Dict:
+    return {
+        **file, "sha": f"{number:020x}{k:020x}", "additions": 40, "deletions": 0, "changes": 40,
+        "blob_url": f"https://github.com/blob/{file['filename']}", "raw_url": f"https://github.com/raw/{file['filename']}",
+        "patch": "@@ -0,0 +1,40 @@\n" + "+    answer = solve(int(input()))  # 풀이\n" * 40
+    }
+
+def generate(spec: CorpusSpec) -> Tuple[List[Dict], Dict[int, List[Dict]]]:
+    """(pull_requests, pull_request_files)를 반환. PullRequestFetcher의 get_pull_requests / get_pull_request_files와 같은 모양이다."""
+    r = random.Random(spec.seed)
+    roster = Roster.shared()
+    users = list(roster.id_map)
+    folders = list(settings.validator.ALLOWED_FOLDERNAMES)
+    extensions = list(settings.validator.ALLOWED_EXTENSIONS)
+    prefix = settings.validator.FILENAME_WITH_NUMBER_PREFIX
+    delimiter = settings.validator.FILENAME_DELIMITER
+    title_date = spec.title_date().strftime('%y-%m-%d')
+    created_at = spec.report_date - timedelta(hours=12)
+
+    pull_requests, pull_request_files = [], {}
+    for number in range(1, spec.pull_requests + 1):
+        user_id = r.choice(users)
+        name = roster.name(user_id)
+        other = roster.name(r.choice(users))
+
+        title = r.choice(INVALID_TITLES) if r.random() < spec.invalid_title else f"[Baekjoon] {title_date}"
+        labels = [] if r.random() < spec.invalid_label else [name]
+        pull_requests.append({
+            "number": number,
+            "title": title,
+            "user": {"login": user_id},
+            "created_at": created_at.isoformat(),
+            "labels": [{"name": l} for l in labels],
+            "head": {"sha": f"{spec.seed:08x}{number:032x}"}
+        })
+
+        files = []
+        for k in range(spec.files_per_pr):
+            ext = r.choice(extensions)
+            folder = r.choice(INVALID_FOLDERS) if r.random() < spec.invalid_path else r.choice(folders)
+            if r.random() < spec.invalid_filename:
+                filename = r.choice(INVALID_FILENAMES).format(name=name, other=other, prefix=prefix, ext=ext)
+            elif r.random() < 0.2:
+                filename = f"{prefix}{1000 + k}{delimiter}{name}.{ext}"
+            else:
+                filename = f"문제{number}{k}{delimiter}{name}.{ext}"
+            files.append({"filename": f"baekjoon/{folder}/{filename}", "status": "added"})
+        if spec.full_payloads:
+            pull_requests[-1] = full_pull_request(pull_requests[-1])
+            files = [full_file(f, number, k) for k, f in enumerate(files)]
+        pull_request_files[number] = files
+
+    return pull_requests, pull_request_files
@@ -0,0 +1,166 @@
+"""파싱 / 파일명 분해 / 검사 / 보고서 생성 단계의 CPU 시간을 PR 수 x 파일 수 별로 측정한다.
+
+    python -m benchmarks.cpu_stages                       # 측정 결과 출력
+    python -m benchmarks.cpu_stages --output result.json  # 측정 결과를 JSON으로 저장
+    python -m benchmarks.cpu_stages --check               # 저장된 baseline보다 threshold 이상 느려지면 exit code 1
+    python -m benchmarks.cpu_stages --save-baseline       # 현재 결과를 baseline으로 저장
+
+컴퓨터마다 속도가 다르므로 비교는 최솟값을 같은 컴퓨터에서 측정한 고정 작업(calibrate)의 시간으로 나눈 값으로 한다.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from models import MergePullRequestResult, MergeResult
+from services import PullRequestParser, PullRequestValidator
+from utils import DiscordMessageBuilder, FileUtil
+from .corpus import CorpusSpec, generate
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "cpu_stages.json")
+DEFAULT_SIZES = ["10x10", "100x10", "1000x10", "100x100"]
+DEFAULT_THRESHOLD = 1.5
+FORMAT_VERSION = 1
+
+def calibrate() -> None:
+    """문자열 분해와 dict 갱신으로 이루어진 고정 작업. 측정 대상과 비슷한 종류의 연산을 사용한다."""
+    counts: Dict[str, int] = {}
+    for i in range(20000):
+        key = f"baekjoon/DP/문제{i % 97}_{i}.py".rsplit("/", 1)[-1].split("_")[0]
+        counts[key] = counts.get(key, 0) + 1
+
+def measure(run: Callable[[], object], repeat: int, min_seconds: float = 0.2) -> Dict[str, float]:
+    """한 번 미리 실행한 뒤 run을 최소 repeat번, 총 min_seconds 이상 실행하고 중앙값 / 최솟값(초)을 반환"""
+    run()
+    samples: List[float] = []
+    total = 0.0
+    while len(samples) < repeat or total < min_seconds:
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed)
+        total += elapsed
+    return {"median": statistics.median(samples), "min": min(samples), "samples": len(samples)}
+
+def stages(spec: CorpusSpec) -> Dict[str, Callable[[], object]]:
+    """단계별 측정 함수. 측정할 단계의 입력은 미리 만들어 두고 각 함수는 그 단계만 실행한다."""
+    pull_requests, pull_request_files = generate(spec)
+
+    def parse():
+        parser = PullRequestParser()
+        parser.parse(pull_requests=pull_requests, pull_request_files=pull_request_files)
+        return parser.parsed_pull_requests
+
+    parsed = parse()
+    files = [p.files for p in parsed]
+    validator = PullRequestValidator()
+    validated = validator.get_validation_result(parsed, reference_date=spec.title_date())
+    merge_results = [
+        MergePullRequestResult(merge=MergeResult.test_merge_result(v.validation_result), validation=v)
+        for v in validated
+    ]
+
+    return {
+        "parse": parse,
+        "parse_files": lambda: [FileUtil.parse_files(f) for f in files],
+        "validate": lambda: validator.get_validation_result(parsed, reference_date=spec.title_date()),
+        "build_report": lambda: DiscordMessageBuilder().build_report(merge_pull_request_results=merge_results),
+    }
+
+def parse_size(size: str) -> CorpusSpec:
+    pull_requests, files_per_pr = size.lower().split("x")
+    return CorpusSpec(pull_requests=int(pull_requests), files_per_pr=int(files_per_pr))
+
+def run(sizes: List[str], repeat: int) -> Dict:
+    # 잡음이 가장 적은 최솟값으로 비교한다
+    calibration = measure(calibrate, repeat, min_seconds=0.5)["min"]
+    results = {}
+    for size in sizes:
+        spec = parse_size(size)
+        for stage, fn in stages(spec).items():
+            m = measure(fn, repeat)
+            results[f"{stage}/{spec.label()}"] = {
+                "stage": stage,
+                "pull_requests": spec.pull_requests,
+                "files_per_pr": spec.files_per_pr,
+                "median_seconds": m["median"],
+                "min_seconds": m["min"],
+                "samples": m["samples"],
+                "normalized": m["min"] / calibration,
+            }
+    return {
+        "version": FORMAT_VERSION,
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+        },
+        "calibration_seconds": calibration,
+        "results": results,
+    }
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """baseline 대비 normalized 값이 threshold 배 이상 커진 항목을 반환"""
+    regressions = []
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        ratio = result["normalized"] / base["normalized"]
+        if ratio > threshold:
+            regressions.append(f"{key}: {ratio:.2f}x slower than baseline")
+    return regressions
+
+def print_table(current: Dict, baseline: Dict | None):
+    print(f"{'benchmark':<26}{'median ms':>12}{'min ms':>10}{'normalized':>12}{'vs base':>10}")
+    for key, r in current["results"].items():
+        base = (baseline or {}).get("results", {}).get(key)
+        ratio = f"{r['normalized'] / base['normalized']:.2f}x" if base else "-"
+        print(f"{key:<26}{r['median_seconds'] * 1000:>12.2f}{r['min_seconds'] * 1000:>10.2f}{r['normalized']:>12.2f}{ratio:>10}")
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="PR 수 x PR당 파일 수 (ex. 100x10)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="측정 결과를 저장할 JSON 파일")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    current = run(args.sizes, args.repeat)
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_table(current, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}")
+
+    if args.check:
+        if baseline is None:
+            print(f"no baseline at {args.baseline}", file=sys.stderr)
+            return 1
+        regressions = compare(current, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
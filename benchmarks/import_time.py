@@ -0,0 +1,79 @@
+"""main.py를 import 하거나 `main.py --help`를 실행하는 데 걸리는 시간을 측정한다.
+
+    python -m benchmarks.import_time               # 측정 결과 출력
+    python -m benchmarks.import_time --check       # 예산을 넘거나 무거운 모듈을 불러오면 exit code 1
+
+시간은 새 interpreter에서 측정하고, 아무것도 하지 않는 interpreter의 시작 시간을 뺀 값으로 비교한다.
+컴퓨터마다 다른 시간과 달리 `import main` 뒤에 HEAVY_MODULES가 불러와졌는지는 항상 같게 검사된다.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# CLI를 시작할 때는 불러오지 않아야 하는 모듈. 각 명령을 실행할 때 함수 안에서 불러온다
+HEAVY_MODULES = ["aiohttp", "discord", "requests", "pydantic"]
+DEFAULT_BUDGET_MS = 100
+DEFAULT_REPEAT = 7
+
+def elapsed(args: List[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def measure(args: List[str], repeat: int) -> float:
+    """새 interpreter에서 repeat번 실행한 최솟값(초)"""
+    return min(elapsed(args) for _ in range(repeat))
+
+def loaded_heavy_modules() -> List[str]:
+    code = (
+        "import sys, json, main; "
+        f"print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}} & set({HEAVY_MODULES!r}))))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+def run(repeat: int) -> Dict:
+    interpreter = measure(["-c", "pass"], repeat)
+    return {
+        "interpreter_ms": interpreter * 1000,
+        "import_main_ms": (measure(["-c", "import main"], repeat) - interpreter) * 1000,
+        "help_ms": (measure(["main.py", "--help"], repeat) - interpreter) * 1000,
+        "heavy_modules": loaded_heavy_modules(),
+    }
+
+def problems(result: Dict, budget_ms: float) -> List[str]:
+    found = []
+    if result["heavy_modules"]:
+        found.append(f"`import main` loads {', '.join(result['heavy_modules'])}")
+    for key in ("import_main_ms", "help_ms"):
+        if result[key] > budget_ms:
+            found.append(f"{key} {result[key]:.1f}ms > budget {budget_ms:.1f}ms")
+    return found
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="interpreter 시작 시간을 뺀 허용 시간")
+    parser.add_argument("--output", help="측정 결과를 저장할 JSON 파일")
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args(argv)
+
+    result = run(args.repeat)
+    print(f"interpreter {result['interpreter_ms']:.1f}ms, "
+          f"import main +{result['import_main_ms']:.1f}ms, main.py --help +{result['help_ms']:.1f}ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    found = problems(result, args.budget_ms)
+    for problem in found:
+        print(problem)
+    return 1 if args.check and found else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
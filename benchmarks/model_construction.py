@@ -0,0 +1,93 @@
+"""내부 모델(slots dataclass)과 기존 pydantic 모델의 생성 비용 / 메모리 비교.
+
+    python -m benchmarks.model_construction --files 10000
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, List
+
+from pydantic import BaseModel
+from models import CommitFile, ValidationResult, PullRequest
+
+# 변경 전의 pydantic 모델과 같은 정의
+class PydanticCommitFile(BaseModel):
+    path: List[str] | None = None
+    filename: str | None = None
+    extension: str | None = None
+    prefix: str = ""
+
+class PydanticValidationResult(BaseModel):
+    validation: str
+    result: bool
+    reason: str
+
+class PydanticPullRequest(BaseModel):
+    number: int
+    title: str
+    user_id: str
+    created_at: datetime
+    labels: List[str]
+    files: List[str]
+
+def build_commit_files(cls, n: int) -> list:
+    return [
+        cls(path=["baekjoon", "DP"], filename=f"문제{i}_승열", extension="py", prefix="")
+        for i in range(n)
+    ]
+
+def build_validation_results(cls, n: int) -> list:
+    return [cls(validation="validate_file_path", result=True, reason="") for _ in range(n)]
+
+def build_pull_requests(cls, n: int, files_per_pr: int = 10) -> list:
+    now = datetime.now()
+    return [
+        cls(
+            number=i,
+            title="[Baekjoon] 23-03-21",
+            user_id="danielchoi1115",
+            created_at=now,
+            labels=["승열"],
+            files=[f"baekjoon/DP/문제{i}_{k}_승열.py" for k in range(files_per_pr)]
+        )
+        for i in range(n // files_per_pr)
+    ]
+
+def measure(build: Callable[[], list], repeat: int = 5) -> dict:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    objects = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return {"seconds": best, "bytes": current}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=10000)
+    args = parser.parse_args()
+    n = args.files
+
+    cases = [
+        ("CommitFile", build_commit_files, PydanticCommitFile, CommitFile),
+        ("ValidationResult", build_validation_results, PydanticValidationResult, ValidationResult),
+        ("PullRequest", build_pull_requests, PydanticPullRequest, PullRequest),
+    ]
+    print(f"{'model':<18}{'pydantic ms':>14}{'slots ms':>12}{'speedup':>10}{'pydantic KiB':>15}{'slots KiB':>12}")
+    for name, build, pydantic_cls, slots_cls in cases:
+        before = measure(lambda: build(pydantic_cls, n))
+        after = measure(lambda: build(slots_cls, n))
+        print(
+            f"{name:<18}"
+            f"{before['seconds'] * 1000:>14.1f}{after['seconds'] * 1000:>12.1f}"
+            f"{before['seconds'] / after['seconds']:>9.1f}x"
+            f"{before['bytes'] / 1024:>15.0f}{after['bytes'] / 1024:>12.0f}"
+        )
+
+if __name__ == '__main__':
+    main()
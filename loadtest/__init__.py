@@ -0,0 +1 @@
+"""로컬 fake Github 서버와 main() 부하 테스트"""
@@ -0,0 +1,372 @@
+"""Github REST / GraphQL API와 Discord API를 흉내내는 로컬 서버.
+
+응답은 다음 순서로 정한다.
+1. upstream이 있으면 요청을 그대로 upstream에 보내고 응답을 cassette에 기록한다 (record)
+2. cassette에 같은 요청이 기록되어 있으면 기록된 응답을 돌려준다 (replay)
+3. 그 외에는 fixture의 PR / 파일 목록으로 응답을 만든다
+
+Faults로 지연 시간, 403 secondary rate limit, 405 merge 실패, 페이지 크기 제한을 넣을 수 있다.
+
+    python -m loadtest.fake_github --port 8765 --pull-requests 300 --latency-ms 50
+"""
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import argparse
+import threading
+from collections import Counter
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Dict, List
+
+import pytz
+from aiohttp import web, ClientSession
+log = logging.getLogger(__name__)
+
+SECONDARY_RATE_LIMIT_MESSAGE = "You have exceeded a secondary rate limit. Please wait a few minutes before you try again."
+BASE_BRANCH_MODIFIED_MESSAGE = "Base branch was modified. Review and try the merge again."
+NOT_MERGEABLE_MESSAGE = "Pull Request is not mergeable"
+# 기록 / 재생할 응답 헤더
+RECORDED_HEADERS = ("Content-Type", "Link", "ETag", "Last-Modified", "Retry-After")
+
+@dataclass
+class Faults:
+    latency_ms: float = 0
+    jitter_ms: float = 0
+    # Github의 최대값은 100. 작게 잡으면 페이지를 더 많이 넘긴다
+    max_per_page: int = 100
+    # Github API 요청이 403 + Retry-After를 받을 확률
+    secondary_rate_limit_rate: float = 0
+    retry_after: float = 1
+    # merge 요청이 한 번 "Base branch was modified"로 실패할 확률 (다시 요청하면 성공한다)
+    base_modified_rate: float = 0
+    # PR이 충돌로 merge 되지 않을 확률
+    merge_conflict_rate: float = 0
+    rate_limit: int = 5000
+    seed: int = 0
+
+@dataclass
+class Fixture:
+    pull_requests: List[Dict]
+    pull_request_files: Dict[int, List[Dict]]
+
+    @classmethod
+    def from_corpus(cls, pull_requests: int, files_per_pr: int, seed: int = 0, **kwargs) -> "Fixture":
+        """오늘 날짜 기준으로 올바른 타이틀을 가진 합성 PR을 만든다"""
+        from benchmarks.corpus import CorpusSpec, generate
+        spec = CorpusSpec(
+            pull_requests=pull_requests,
+            files_per_pr=files_per_pr,
+            seed=seed,
+            report_date=datetime.now(pytz.timezone('Asia/Seoul')),
+            **kwargs
+        )
+        return cls(*generate(spec))
+
+    @classmethod
+    def load(cls, path: str) -> "Fixture":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            pull_requests=data["pull_requests"],
+            pull_request_files={int(k): v for k, v in data["pull_request_files"].items()}
+        )
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, ensure_ascii=False)
+
+class Cassette:
+    """요청별로 기록한 응답. 같은 요청이 여러 번 기록되어 있으면 순서대로 돌려주고 마지막 응답을 반복한다.
+    Link 헤더의 upstream 주소는 `{base}`로 바꿔서 저장하고, 재생할 때 이 서버의 주소로 채운다.
+    """
+    def __init__(self, interactions: Dict[str, List[Dict]] | None = None):
+        self.interactions = interactions or {}
+        self.played: Counter = Counter()
+
+    @staticmethod
+    def key(method: str, path_qs: str) -> str:
+        return f"{method.upper()} {path_qs}"
+
+    def record(self, method: str, path_qs: str, status: int, headers: Dict[str, str], body: str, upstream: str):
+        recorded = {k: v.replace(upstream, "{base}") for k, v in headers.items() if k in RECORDED_HEADERS}
+        self.interactions.setdefault(self.key(method, path_qs), []).append(
+            {"status": status, "headers": recorded, "body": body}
+        )
+
+    def replay(self, method: str, path_qs: str, base: str) -> web.Response | None:
+        key = self.key(method, path_qs)
+        responses = self.interactions.get(key)
+        if not responses:
+            return None
+        r = responses[min(self.played[key], len(responses) - 1)]
+        self.played[key] += 1
+        headers = {k: v.replace("{base}", base) for k, v in r["headers"].items()}
+        return web.Response(status=r["status"], headers=headers, body=r["body"].encode("utf-8"))
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.interactions, f, ensure_ascii=False, indent=1)
+
+def etag(body: str) -> str:
+    return '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+
+class FakeGithub:
+    def __init__(
+        self,
+        fixture: Fixture | None = None,
+        faults: Faults | None = None,
+        cassette: Cassette | None = None,
+        upstream: str | None = None
+    ):
+        self.fixture = fixture or Fixture([], {})
+        self.faults = faults or Faults()
+        self.cassette = cassette or (Cassette() if upstream else None)
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.rng = random.Random(self.faults.seed)
+        self.stats: Counter = Counter()
+        self.merged: set = set()
+        self.base_modified: set = set()
+        self.conflicts = {
+            p["number"] for p in self.fixture.pull_requests
+            if self.rng.random() < self.faults.merge_conflict_rate
+        }
+        self.discord_messages: List[str] = []
+        self.remaining = self.faults.rate_limit
+        self.reset_at = int(time.time()) + 3600
+        self.base_url: str | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._runner: web.AppRunner | None = None
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get("/repos/{owner}/{repo}/pulls", self.pulls)
+        app.router.add_get("/repos/{owner}/{repo}/pulls/{number}/files", self.files)
+        app.router.add_put("/repos/{owner}/{repo}/pulls/{number}/merge", self.merge)
+        app.router.add_get("/repos/{owner}/{repo}/pulls/{number}/merge", self.is_merged)
+        app.router.add_post("/graphql", self.graphql)
+        app.router.add_post("/discord/channels/{channel_id}/messages", self.discord)
+        return app
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        self.stats["requests"] += 1
+        if self.faults.latency_ms or self.faults.jitter_ms:
+            await asyncio.sleep(max(0, self.faults.latency_ms + self.rng.uniform(-1, 1) * self.faults.jitter_ms) / 1000)
+        if request.path.startswith("/discord/"):
+            return await handler(request)
+
+        if self.upstream:
+            res = await self.forward(request)
+        elif self.cassette and (res := self.cassette.replay(request.method, request.path_qs, self.request_base(request))):
+            self.stats["replayed"] += 1
+        elif self.rng.random() < self.faults.secondary_rate_limit_rate:
+            res = web.json_response(
+                {"message": SECONDARY_RATE_LIMIT_MESSAGE},
+                status=403,
+                headers={"Retry-After": str(self.faults.retry_after)}
+            )
+        else:
+            res = await handler(request)
+        self.remaining = max(0, self.remaining - 1)
+        res.headers.setdefault("X-RateLimit-Limit", str(self.faults.rate_limit))
+        res.headers.setdefault("X-RateLimit-Remaining", str(self.remaining))
+        res.headers.setdefault("X-RateLimit-Reset", str(self.reset_at))
+        self.stats[str(res.status)] += 1
+        return res
+
+    @staticmethod
+    def request_base(request: web.Request) -> str:
+        return f"{request.scheme}://{request.host}"
+
+    async def forward(self, request: web.Request) -> web.Response:
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in ("host", "content-length")}
+        body = await request.read()
+        async with ClientSession() as session:
+            async with session.request(request.method, self.upstream + request.path_qs, headers=headers, data=body or None) as up:
+                text = await up.text()
+                self.cassette.record(request.method, request.path_qs, up.status, dict(up.headers), text, self.upstream)
+                self.stats["recorded"] += 1
+                headers = {
+                    k: v.replace(self.upstream, self.request_base(request))
+                    for k, v in up.headers.items() if k in RECORDED_HEADERS or k.startswith("X-RateLimit")
+                }
+                return web.Response(status=up.status, headers=headers, body=text.encode("utf-8"))
+
+    def page(self, request: web.Request, items: List[Dict]) -> web.Response:
+        per_page = min(int(request.query.get("per_page", 30)), self.faults.max_per_page)
+        page = int(request.query.get("page", 1))
+        chunk = items[(page - 1) * per_page: page * per_page]
+        body = json.dumps(chunk, ensure_ascii=False)
+        headers = {"ETag": etag(body)}
+        if page * per_page < len(items):
+            headers["Link"] = f'<{request.url.update_query(per_page=per_page, page=page + 1)}>; rel="next"'
+        if request.headers.get("If-None-Match") == headers["ETag"]:
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body.encode("utf-8"), content_type="application/json", headers=headers)
+
+    def open_pull_requests(self) -> List[Dict]:
+        return [p for p in self.fixture.pull_requests if p["number"] not in self.merged]
+
+    async def pulls(self, request: web.Request) -> web.Response:
+        return self.page(request, self.open_pull_requests())
+
+    async def files(self, request: web.Request) -> web.Response:
+        number = int(request.match_info["number"])
+        if number not in self.fixture.pull_request_files:
+            return web.json_response({"message": "Not Found"}, status=404)
+        return self.page(request, self.fixture.pull_request_files[number])
+
+    async def merge(self, request: web.Request) -> web.Response:
+        number = int(request.match_info["number"])
+        if number in self.merged or number in self.conflicts:
+            self.stats["merge_conflicts"] += 1
+            return web.json_response({"message": NOT_MERGEABLE_MESSAGE}, status=405)
+        if number not in self.base_modified and self.rng.random() < self.faults.base_modified_rate:
+            self.base_modified.add(number)
+            self.stats["base_modified"] += 1
+            return web.json_response({"message": BASE_BRANCH_MODIFIED_MESSAGE}, status=405)
+        self.merged.add(number)
+        self.stats["merged"] += 1
+        return web.json_response({
+            "sha": hashlib.sha1(f"merge-{number}".encode()).hexdigest(),
+            "merged": True,
+            "message": "Pull Request successfully merged"
+        })
+
+    async def is_merged(self, request: web.Request) -> web.Response:
+        if int(request.match_info["number"]) in self.merged:
+            return web.Response(status=204)
+        return web.json_response({"message": "Not Found"}, status=404)
+
+    def graphql_files(self, number: int, cursor: str | None, first: int) -> Dict:
+        files = self.fixture.pull_request_files.get(number, [])
+        start = int(cursor or 0)
+        chunk = files[start:start + min(first, self.faults.max_per_page)]
+        return {
+            "pageInfo": {"hasNextPage": start + len(chunk) < len(files), "endCursor": str(start + len(chunk))},
+            "nodes": [
+                {"path": f["filename"], "changeType": "DELETED" if f["status"] == "removed" else f["status"].upper()}
+                for f in chunk
+            ]
+        }
+
+    async def graphql(self, request: web.Request) -> web.Response:
+        """PullRequestGraphQLFetcher가 보내는 두 쿼리만 지원한다"""
+        variables = (await request.json())["variables"]
+        if "number" in variables:
+            files = self.graphql_files(variables["number"], variables.get("cursor"), variables["files"])
+            return web.json_response({"data": {"repository": {"pullRequest": {"files": files}}}})
+
+        pull_requests = self.open_pull_requests()
+        start = int(variables.get("cursor") or 0)
+        chunk = pull_requests[start:start + min(variables["first"], self.faults.max_per_page)]
+        nodes = [
+            {
+                "number": p["number"],
+                "title": p["title"],
+                "createdAt": p["created_at"],
+                "headRefOid": p["head"]["sha"],
+                "author": p["user"],
+                "labels": {"nodes": p["labels"]},
+                "files": self.graphql_files(p["number"], None, variables["files"])
+            }
+            for p in chunk
+        ]
+        return web.json_response({"data": {"repository": {"pullRequests": {
+            "pageInfo": {"hasNextPage": start + len(chunk) < len(pull_requests), "endCursor": str(start + len(chunk))},
+            "nodes": nodes
+        }}}})
+
+    async def discord(self, request: web.Request) -> web.Response:
+        content = (await request.json())["content"]
+        self.discord_messages.append(content)
+        return web.json_response(
+            {"id": str(len(self.discord_messages)), "content": content},
+            headers={"X-RateLimit-Remaining": "5", "X-RateLimit-Reset-After": "0"}
+        )
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """별도 스레드의 이벤트 루프에서 서버를 띄우고 주소를 반환. port가 0이면 빈 포트를 사용한다"""
+        started = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        async def setup():
+            self._runner = web.AppRunner(self.app())
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, host, port)
+            await site.start()
+            bound_port = self._runner.addresses[0][1]
+            self.base_url = f"http://{host}:{bound_port}"
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(setup())
+            started.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        started.wait()
+        return self.base_url
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pull-requests", type=int, default=100)
+    parser.add_argument("--files-per-pr", type=int, default=10)
+    parser.add_argument("--fixture", help="Fixture.save로 저장한 JSON. 지정하면 합성 PR 대신 사용한다")
+    parser.add_argument("--cassette", help="재생할 (--record와 함께 쓰면 기록할) cassette JSON")
+    parser.add_argument("--record", metavar="UPSTREAM", help="요청을 UPSTREAM(ex. https://api.github.com)에 보내고 응답을 기록한다")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--max-per-page", type=int, default=100)
+    parser.add_argument("--rate-limit-rate", type=float, default=0)
+    parser.add_argument("--base-modified-rate", type=float, default=0)
+    parser.add_argument("--merge-conflict-rate", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fixture = Fixture.load(args.fixture) if args.fixture else Fixture.from_corpus(args.pull_requests, args.files_per_pr, args.seed)
+    cassette = Cassette.load(args.cassette) if args.cassette and not args.record else Cassette() if args.record else None
+    server = FakeGithub(
+        fixture=fixture,
+        faults=Faults(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            max_per_page=args.max_per_page,
+            secondary_rate_limit_rate=args.rate_limit_rate,
+            base_modified_rate=args.base_modified_rate,
+            merge_conflict_rate=args.merge_conflict_rate,
+            seed=args.seed
+        ),
+        cassette=cassette,
+        upstream=args.record
+    )
+    print(f"Serving fake Github API on {server.start(args.host, args.port)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        if args.record and args.cassette:
+            cassette.save(args.cassette)
+            print(f"Recorded {server.stats['recorded']} responses to {args.cassette}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""main() 전체를 로컬 fake Github 서버에 대해 실행하고 처리량 / 지연 시간을 측정한다.
+
+    python -m loadtest.run --pull-requests 300 --latency-ms 50 --jitter-ms 30 \\
+        --rate-limit-rate 0.02 --base-modified-rate 0.05 --merge-conflict-rate 0.02 --output result.json
+
+기본값으로는 운영과 같은 RateLimiter 속도(default lane 초당 10건, merge lane 초당 1건)를 사용한다.
+fetch / merge 코드 자체의 처리량을 보려면 --request-rate, --merge-rate로 속도 제한을 올린다.
+--record를 사용하면 실제 Github API로 요청이 전달되므로 merge를 하지 않도록 --skip-merge와 함께 사용한다.
+"""
+import sys
+import json
+import time
+import argparse
+import tempfile
+from typing import Dict
+
+from configs import settings
+from network import HttpTransport, TokenBucket
+from telemetry import MetricsRegistry, HTTP_REQUEST_SECONDS, RATELIMIT_WAIT_SECONDS
+from services import DiscordRestNotifier
+from services.pull_requests.pull_request_graphql_fetcher import graphql_target
+from .fake_github import FakeGithub, Faults, Fixture, Cassette
+
+def point_settings_at(base_url: str, owner: str, name: str):
+    """settings.github의 API 주소를 fake 서버로 바꾼다"""
+    repository = f"{base_url}/repos/{owner}/{name}"
+    urls = {
+        "url_pull_requests": lambda: f"{repository}/pulls",
+        "url_pull_request_files": lambda pull_number: f"{repository}/pulls/{pull_number}/files",
+        "url_merge_pull_request": lambda pull_number: f"{repository}/pulls/{pull_number}/merge",
+    }
+    for attr, url in urls.items():
+        object.__setattr__(settings.github, attr, url)
+
+def set_lane_rate(lane: str, rate: float | None):
+    if rate is not None:
+        HttpTransport.shared().limiter.lanes[lane] = TokenBucket(rate, max(1, rate))
+
+def latency_report(metrics: MetricsRegistry) -> Dict[str, Dict]:
+    """lane(fetch = default, merge, discord)별 호출 수와 지연 시간 분위수"""
+    report = {}
+    for labels, h in metrics.families[HTTP_REQUEST_SECONDS].series.items():
+        labels = dict(labels)
+        key = f"{labels['method']} {labels['lane']} {labels['status']}"
+        report[key] = {
+            "count": h.count,
+            "p50": h.quantile(0.5),
+            "p95": h.quantile(0.95),
+            "p99": h.quantile(0.99),
+            "max": h.max,
+        }
+    return report
+
+def run(args: argparse.Namespace) -> Dict:
+    import main as pipeline
+
+    fixture = Fixture.load(args.fixture) if args.fixture else Fixture.from_corpus(
+        args.pull_requests, args.files_per_pr, args.seed,
+        invalid_title=args.invalid_rate,
+        invalid_label=args.invalid_rate,
+        invalid_path=args.invalid_rate,
+        invalid_filename=args.invalid_rate,
+        full_payloads=args.full_payloads
+    )
+    cassette = Cassette.load(args.cassette) if args.cassette and not args.record else None
+    server = FakeGithub(
+        fixture=fixture,
+        faults=Faults(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            max_per_page=args.max_per_page,
+            secondary_rate_limit_rate=args.rate_limit_rate,
+            retry_after=args.retry_after,
+            base_modified_rate=args.base_modified_rate,
+            merge_conflict_rate=args.merge_conflict_rate,
+            seed=args.seed
+        ),
+        cassette=cassette,
+        upstream=args.record
+    )
+    base_url = server.start()
+
+    # set_test()는 main()보다 먼저 적용해야 fake 서버 주소가 덮어써지지 않는다
+    if args.test_repository:
+        settings.github.set_test()
+    _, owner, name = graphql_target(settings.github.url_pull_requests())
+    # GraphQL endpoint는 url_pull_requests()에서 구하므로 {base_url}/graphql이 된다
+    point_settings_at(base_url, owner, name)
+    DiscordRestNotifier.API_URL = f"{base_url}/discord"
+    workdir = tempfile.mkdtemp(prefix="gwichanhub-loadtest-")
+    pipeline.HTTP_CACHE_DIR = f"{workdir}/http"
+    pipeline.VALIDATION_CACHE_PATH = f"{workdir}/validation.sqlite3"
+    pipeline.HISTORY_PATH = f"{workdir}/history.sqlite3"
+    pipeline.JOURNAL_PATH = f"{workdir}/journal.jsonl"
+    set_lane_rate("default", args.request_rate)
+    set_lane_rate("merge", args.merge_rate)
+
+    metrics = MetricsRegistry.shared()
+    start = time.perf_counter()
+    try:
+        pipeline.main(
+            skip_merge=args.skip_merge,
+            test_channel=True,
+            async_fetch=not args.sync_fetch,
+            graphql_fetch=args.graphql,
+            stream=not args.no_stream
+        )
+    finally:
+        elapsed = time.perf_counter() - start
+        server.stop()
+        if args.record and args.cassette:
+            server.cassette.save(args.cassette)
+
+    return {
+        "pull_requests": len(fixture.pull_requests),
+        "files": sum(len(f) for f in fixture.pull_request_files.values()),
+        "elapsed_seconds": elapsed,
+        "pull_requests_per_second": len(fixture.pull_requests) / elapsed if elapsed else 0,
+        "stages": {s.name: s.seconds for s in metrics.spans},
+        "http": latency_report(metrics),
+        "ratelimit_wait_seconds": metrics.merged(RATELIMIT_WAIT_SECONDS).sum,
+        "server": dict(server.stats),
+        "discord_messages": len(server.discord_messages),
+    }
+
+def print_result(result: Dict):
+    print(f"{result['pull_requests']} PRs / {result['files']} files in {result['elapsed_seconds']:.2f}s "
+          f"({result['pull_requests_per_second']:.1f} PR/s), rate limit wait {result['ratelimit_wait_seconds']:.2f}s")
+    print("stages: " + " | ".join(f"{k} {v:.2f}s" for k, v in result["stages"].items()))
+    print(f"{'call':<24}{'count':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}")
+    for key, h in sorted(result["http"].items()):
+        print(f"{key:<24}{h['count']:>8}{h['p50']:>8.3f}{h['p95']:>8.3f}{h['p99']:>8.3f}{h['max']:>8.3f}")
+    print("server: " + ", ".join(f"{k}={v}" for k, v in sorted(result["server"].items())))
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pull-requests", type=int, default=300)
+    parser.add_argument("--files-per-pr", type=int, default=10)
+    parser.add_argument("--invalid-rate", type=float, default=0.02, help="합성 PR의 타이틀 / 라벨 / 경로 / 파일명이 잘못될 확률")
+    parser.add_argument("--full-payloads", action="store_true", help="실제 응답처럼 저장소 정보와 patch까지 채운 PR을 만든다")
+    parser.add_argument("--fixture", help="Fixture.save로 저장한 JSON. 지정하면 합성 PR 대신 사용한다")
+    parser.add_argument("--cassette", help="재생할 (--record와 함께 쓰면 기록할) cassette JSON")
+    parser.add_argument("--record", metavar="UPSTREAM", help="요청을 UPSTREAM(ex. https://api.github.com)에 보내고 응답을 기록한다")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--max-per-page", type=int, default=100)
+    parser.add_argument("--rate-limit-rate", type=float, default=0, help="403 secondary rate limit 응답 비율")
+    parser.add_argument("--retry-after", type=float, default=1)
+    parser.add_argument("--base-modified-rate", type=float, default=0, help="405 Base branch was modified 응답 비율")
+    parser.add_argument("--merge-conflict-rate", type=float, default=0, help="405 not mergeable 응답 비율")
+    parser.add_argument("--request-rate", type=float, help="default lane의 초당 요청 수")
+    parser.add_argument("--merge-rate", type=float, help="merge lane의 초당 요청 수")
+    parser.add_argument("--sync-fetch", action="store_true")
+    parser.add_argument("--graphql", action="store_true")
+    parser.add_argument("--skip-merge", action="store_true")
+    parser.add_argument("--no-stream", action="store_true", help="단계마다 모든 PR을 기다린 뒤에 다음 단계를 실행한다")
+    parser.add_argument("--test-repository", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="측정 결과를 저장할 JSON 파일")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    print_result(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
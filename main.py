@@ -1,27 +1,300 @@
+"""gwichanhub CLI
 
+    python main.py                            # = python main.py run (cron)
+    python main.py run --skip-merge --test-channel
+    python main.py run --repositories [PATH]  # 여러 저장소 (models.RepositoriesConfig)
+    python main.py fetch --output payload.json
+    python main.py validate --input payload.json
+    python main.py merge --input validation.json --skip-merge --output merge.json
+    python main.py report --input merge.json --dry-run
+    python main.py serve --port 8080
+    python main.py history --month 2023-03
+
+실행할 명령에서 필요한 모듈만 import 하도록 무거운 의존성(aiohttp, discord, requests, pydantic)은 함수 안에서 불러온다.
+"""
+from __future__ import annotations
+
+import sys
+import json
 import logging
+import argparse
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from network import HttpCache, TokenPool
+    from services import PullRequestFetcher, PullRequestGraphQLFetcher, PullRequestValidator, PullRequestMerger
+    from services.history.run_journal import RunJournal
+    from models import GithubRepository, PullRequestValidationResult, MergePullRequestResult
+
+HTTP_CACHE_DIR = '/usr/share/gwichanhub/cache/http'
+VALIDATION_CACHE_PATH = '/usr/share/gwichanhub/cache/validation.sqlite3'
+# 실행마다 PR별 결과를 쌓아두는 기록 (services.RunHistory)
+HISTORY_PATH = '/usr/share/gwichanhub/history.sqlite3'
+# 실행 중에 끝낸 단계를 기록하는 journal. run --resume으로 멈춘 단계부터 다시 실행한다
+JOURNAL_PATH = '/usr/share/gwichanhub/journal.jsonl'
+# merge_backend가 git / octopus일 때 사용하는 bare mirror
+GIT_MIRROR_PATH = '/usr/share/gwichanhub/cache/mirror.git'
+# api: PR마다 merge API 호출, git: 로컬 mirror에서 PR마다 merge 커밋, octopus: 로컬 mirror에서 merge 커밋 하나
+MERGE_BACKENDS = ('api', 'git', 'octopus')
+# 여러 저장소를 처리할 때 읽는 설정 파일 (models.RepositoriesConfig)
+REPOSITORIES_PATH = '/usr/share/gwichanhub/repositories.json'
+METRICS_JSON_PATH = '/usr/share/gwichanhub/metrics/run.json'
+# node_exporter --collector.textfile.directory 로 지정한 폴더
+METRICS_PROMETHEUS_PATH = '/usr/share/gwichanhub/metrics/gwichanhub.prom'
+LOG_PATH = '/usr/share/gwichanhub/main.log'
+COMMANDS = ('fetch', 'validate', 'merge', 'report', 'run', 'serve', 'history')
+logger = logging.getLogger(__name__)
+    
+def validation_cache_path(repository: GithubRepository | None) -> str:
+    # PR 번호가 저장소마다 겹치므로 저장소마다 다른 파일을 사용한다
+    if repository is None:
+        return VALIDATION_CACHE_PATH
+    return VALIDATION_CACHE_PATH.replace('.sqlite3', f'.{repository.owner}.{repository.name}.sqlite3')
+
+def journal_path(repository: GithubRepository | None) -> str:
+    if repository is None:
+        return JOURNAL_PATH
+    return JOURNAL_PATH.replace('.jsonl', f'.{repository.owner}.{repository.name}.jsonl')
+
+def git_mirror_path(repository: GithubRepository | None) -> str:
+    if repository is None:
+        return GIT_MIRROR_PATH
+    return GIT_MIRROR_PATH.removesuffix('.git') + f'.{repository.owner}.{repository.name}.git'
+
+def build_fetcher(
+    repository: GithubRepository | None,
+    httpCache: HttpCache,
+    async_fetch: bool = True,
+    graphql_fetch: bool = False,
+    tokenPool: TokenPool | None = None
+) -> PullRequestFetcher | PullRequestGraphQLFetcher:
+    from services import PullRequestFetcher, PullRequestGraphQLFetcher
+
+    pullRequestFetcher = PullRequestGraphQLFetcher() if graphql_fetch else PullRequestFetcher().set_cache(httpCache)
+    pullRequestFetcher.set_repository(repository).set_token_pool(tokenPool)
+    if async_fetch and not graphql_fetch:
+        pullRequestFetcher.set_async_fetch(True)
+    return pullRequestFetcher
+
+def build_validator(repository: GithubRepository | None) -> PullRequestValidator:
+    from services import PullRequestValidator
+    from services.pull_requests.validation_cache import ValidationCache
+
+    pullRequestValidator = PullRequestValidator()
+    return pullRequestValidator.set_cache(ValidationCache(validation_cache_path(repository), pullRequestValidator.rules))
+
+def build_merger(
+    repository: GithubRepository | None,
+    skip_merge: bool = False,
+    tokenPool: TokenPool | None = None,
+    merge_backend: str = 'api',
+    journal: RunJournal | None = None
+) -> PullRequestMerger:
+    from services import PullRequestMerger, PullRequestGitMerger
+
+    if merge_backend == 'api':
+        pullRequestMerger = PullRequestMerger()
+    else:
+        pullRequestMerger = PullRequestGitMerger(mirror_path=git_mirror_path(repository)).set_octopus(merge_backend == 'octopus')
+    pullRequestMerger.set_repository(repository).set_token_pool(tokenPool).set_journal(journal)
+    if skip_merge:
+        pullRequestMerger.set_skip_merge(True)
+    return pullRequestMerger
+
+def fetch_repository(
+    repository: GithubRepository | None,
+    httpCache: HttpCache,
+    async_fetch: bool = True,
+    graphql_fetch: bool = False,
+    tokenPool: TokenPool | None = None
+) -> Tuple[List[Dict], Dict]:
+    """(PR 목록, PR 번호별 파일 목록)을 Github API 응답 모양 그대로 반환"""
+    pullRequestFetcher = build_fetcher(repository, httpCache, async_fetch, graphql_fetch, tokenPool)
+    pullRequestFetcher.fetch_all()
+    httpCache.log_stats()
+    return pullRequestFetcher.get_pull_requests(), pullRequestFetcher.get_pull_request_files()
+
+def fetch_pull_request_files(
+    pull_numbers: List[int],
+    repository: GithubRepository | None,
+    httpCache: HttpCache,
+    graphql_fetch: bool = False,
+    tokenPool: TokenPool | None = None
+) -> Dict[int, List[Dict]]:
+    """PR 번호별 파일 목록만 가져온다"""
+    pullRequestFetcher = build_fetcher(repository, httpCache, False, graphql_fetch, tokenPool)
+    return {number: list(pullRequestFetcher.iter_pull_request_files(number)) for number in pull_numbers}
+
+def validate_pull_requests(
+    pull_requests: List[Dict],
+    pull_request_files: Dict,
+    repository: GithubRepository | None = None,
+    span: Callable | None = None
+) -> List[PullRequestValidationResult]:
+    from contextlib import nullcontext
+    from services import PullRequestParser
+
+    span = span or (lambda stage: nullcontext())
+    pullRequestParser = PullRequestParser()
+    pullRequestValidator = build_validator(repository)
+
+    with span("parse"):
+        pullRequestParser.parse(pull_requests=pull_requests, pull_request_files=pull_request_files)
+    with span("validate"):
+        return pullRequestValidator.get_validation_result(pullRequestParser.parsed_pull_requests)
+
+def merge_pull_requests(
+    validation_result: List[PullRequestValidationResult],
+    repository: GithubRepository | None = None,
+    skip_merge: bool = False,
+    tokenPool: TokenPool | None = None,
+    merge_backend: str = 'api',
+    journal: RunJournal | None = None
+) -> List[MergePullRequestResult]:
+    pullRequestMerger = build_merger(repository, skip_merge, tokenPool, merge_backend, journal)
+    pullRequestMerger.merge(validation_result)
+    return pullRequestMerger.get_merge_result()
 
-from services import PullRequestFetcher, PullRequestParser, PullRequestValidator, PullRequestMerger, DiscordBot
-from utils import DiscordMessageBuilder
-from configs import settings
+def stream_repository(
+    repository: GithubRepository | None,
+    httpCache: HttpCache,
+    skip_merge: bool = False,
+    async_fetch: bool = True,
+    graphql_fetch: bool = False,
+    tokenPool: TokenPool | None = None,
+    merge_backend: str = 'api',
+    journal: RunJournal | None = None
+) -> List[MergePullRequestResult]:
+    """fetch → validate → merge를 PR 하나씩 흘려보낸다 (services.PullRequestPipeline). 결과는 merge_pull_requests와 같다"""
+    from services import PullRequestPipeline
+
+    pullRequestFetcher = build_fetcher(repository, httpCache, async_fetch, graphql_fetch, tokenPool)
+    pipeline = PullRequestPipeline(
+        fetcher=pullRequestFetcher,
+        validator=build_validator(repository),
+        merger=build_merger(repository, skip_merge, tokenPool, merge_backend, journal),
+        journal=journal,
+        fetch_workers=pullRequestFetcher.concurrency if async_fetch and not graphql_fetch else 1
+    )
+    merge_result = pipeline.run()
+    httpCache.log_stats()
+    return merge_result
+    
+def process_repository(
+    repository: GithubRepository | None,
+    httpCache: HttpCache,
+    skip_merge: bool = False,
+    async_fetch: bool = True,
+    graphql_fetch: bool = False,
+    tokenPool: TokenPool | None = None,
+    merge_backend: str = 'api',
+    record_history: bool = False,
+    journal: RunJournal | None = None,
+    stream: bool = True
+) -> List[MergePullRequestResult]:
+    """저장소 하나의 PR을 가져와서 검사하고 merge한 결과를 반환. repository가 None이면 settings.github의 저장소를 사용한다
+    journal이 있으면 끝낸 단계를 기록하고, 이미 기록된 단계(resume)는 기록된 결과를 사용한다.
+    stream이 True면 단계마다 모든 PR을 기다리지 않고 PR 하나씩 fetch → validate → merge 한다.
+    """
+    from models import PullRequestValidationResult
+    from services import RunHistory
+    from telemetry import MetricsRegistry
+
+    metrics = MetricsRegistry.shared()
+    prefix = f"{repository.slug} " if repository else ""
+    span = lambda stage: metrics.span(f"{stage}[{repository.slug}]" if repository else stage)
+    
+    fetched = journal.last("fetch") if journal else None
+    listed = journal.last("list") if journal else None
+    if stream and not fetched and not listed:
+        logger.info(f"{prefix}Streaming pull requests...")
+        with span("pipeline"):
+            merge_result = stream_repository(repository, httpCache, skip_merge, async_fetch, graphql_fetch, tokenPool, merge_backend, journal)
+    else:
+        if fetched:
+            logger.info(f"{prefix}Using pull requests fetched by the previous run")
+            # JSON object의 key는 문자열이므로 PR 번호로 되돌린다
+            pull_requests = fetched["pull_requests"]
+            pull_request_files = {int(k): v for k, v in fetched["pull_request_files"].items()}
+        elif listed:
+            # streaming 중에 멈췄으면 merge를 시작하기 전에 기록한 PR 목록이 있다. merge된 PR은 검사 결과도 기록되어 있으므로
+            # 검사 결과가 없는 PR의 파일 목록만 다시 가져온다
+            logger.info(f"{prefix}Using pull requests listed by the previous run")
+            pull_requests = listed["pull_requests"]
+            journaled = journal.validated()
+            with span("fetch"):
+                pull_request_files = fetch_pull_request_files(
+                    [p["number"] for p in pull_requests if p["number"] not in journaled],
+                    repository, httpCache, graphql_fetch, tokenPool
+                )
+            journal.write("fetch", pull_requests=pull_requests, pull_request_files=pull_request_files)
+        else:
+            logger.info(f"{prefix}Fetching pull requests...")
+            with span("fetch"):
+                pull_requests, pull_request_files = fetch_repository(repository, httpCache, async_fetch, graphql_fetch, tokenPool)
+            if journal:
+                journal.write("fetch", pull_requests=pull_requests, pull_request_files=pull_request_files)
+
+        validated = journal.last("validate") if journal else None
+        if validated:
+            logger.info(f"{prefix}Using validation results of the previous run")
+            validation_result = [PullRequestValidationResult.from_dict(d) for d in validated["results"]]
+        else:
+            # streaming 중에 멈췄으면 merge 전에 기록한 PR별 검사 결과가 있다. 다시 검사하면 기준 날짜가 달라질 수 있으므로 그대로 사용한다
+            journaled = journal.validated() if journal else {}
+            remaining = [p for p in pull_requests if p["number"] not in journaled]
+            if journaled:
+                logger.info(f"{prefix}Using {len(pull_requests) - len(remaining)} validation results of the previous run")
+            logger.info(f"{prefix}Validating pull requests...")
+            validated_now = {
+                item.pull_request.number: item
+                for item in validate_pull_requests(remaining, pull_request_files, repository, span)
+            }
+            validation_result = [
+                validated_now.get(p["number"]) or PullRequestValidationResult.from_dict(journaled[p["number"]])
+                for p in pull_requests
+            ]
+            if journal:
+                journal.write("validate", results=validation_result)
+
+        logger.info(f"{prefix}Merging pull requests...")
+        with span("merge"):
+            merge_result = merge_pull_requests(validation_result, repository, skip_merge, tokenPool, merge_backend, journal)
+
+    if record_history and not (journal and journal.last("history")):
+        with span("history"):
+            runHistory = RunHistory(HISTORY_PATH)
+            run_id = runHistory.record(merge_result, repository=repository.slug if repository else "")
+            runHistory.close()
+        if journal:
+            journal.write("history", run_id=run_id)
+    return merge_result
     
 def main(
     skip_merge: bool = False,
     test_channel: bool = False,
-    test_repository: bool = False
+    test_repository: bool = False,
+    async_fetch: bool = True,
+    graphql_fetch: bool = False,
+    timing_summary: bool = True,
+    merge_backend: str = 'api',
+    resume: bool = False,
+    stream: bool = True
 ):
-    pullRequestFetcher = PullRequestFetcher()
-    pullRequestParser = PullRequestParser()
-    pullRequestValidator = PullRequestValidator()
-    pullRequestMerger = PullRequestMerger()
+    from configs import settings
+    from network import HttpCache
+    from services import DiscordRestNotifier, RunJournal
+    from telemetry import MetricsRegistry
+    from utils import DiscordMessageBuilder
+
+    metrics = MetricsRegistry.shared()
     discordMessageBuilder = DiscordMessageBuilder()
-    discordBot = DiscordBot.bot(settings.discord.BOT_TOKEN)
+    discordBot = DiscordRestNotifier.bot(settings.discord.BOT_TOKEN)
     
     if test_repository:
         settings.github.set_test()
         print("test_repository set")
     if skip_merge:
-        pullRequestMerger.set_skip_merge(True)
         discordMessageBuilder.set_skip_merge(True)
         print("skip_merge set")
     if test_channel:
@@ -30,49 +303,390 @@ def main(
     else:
         discordBot.set_channel_id(settings.discord.CHANNEL_ID_SERVICE)
     
-    logger.info("Fetching pull requests...")
-    pullRequestFetcher.fetch_all()
-
-    logger.info("Parsing pull requests...")
-    pullRequestParser.parse(
-        pull_requests=pullRequestFetcher.get_pull_requests(),
-        pull_request_files=pullRequestFetcher.get_pull_request_files()
-    )
-
-    logger.info("Validating pull requests...")
-    validation_result = pullRequestValidator.get_validation_result(pullRequestParser.parsed_pull_requests)
-
-    logger.info("Merging pull requests...")
-    pullRequestMerger.merge(validation_result)
+    # 테스트 merge와 테스트 저장소의 결과는 기록하지 않는다
+    journaled = not skip_merge and not test_repository
+    journal = RunJournal(journal_path(None), resume=resume) if journaled else None
     
-    merge_result = pullRequestMerger.get_merge_result()
+    merge_result = process_repository(
+        repository=None,
+        httpCache=HttpCache(HTTP_CACHE_DIR),
+        skip_merge=skip_merge,
+        async_fetch=async_fetch,
+        graphql_fetch=graphql_fetch,
+        merge_backend=merge_backend,
+        record_history=journaled,
+        journal=journal,
+        stream=stream
+    )
     
     logger.info("Building report...")
-    report = discordMessageBuilder.build_report(merge_pull_request_results=list(reversed(merge_result)))
+    with metrics.span("report_build"):
+        report = discordMessageBuilder.build_report(merge_pull_request_results=list(reversed(merge_result)))
+    # 타이밍 요약은 테스트 채널에만 붙인다
+    if test_channel and timing_summary:
+        report.append(metrics.summary())
         
+    if journal and journal.last("report_sent"):
+        logger.info("Report was already sent by the previous run")
+        journal.close()
+        return
+    
     logger.info("Sending report to Discord Bot...")
-    discordBot.notify(report)
+    with metrics.span("report_send"):
+        discordBot.notify(report)
+    if journal:
+        journal.write("report_sent")
+        journal.close()
     
     logger.info("Report Successfully sent!")
     
-if __name__ == '__main__':
+def main_repositories(
+    config_path: str = REPOSITORIES_PATH,
+    skip_merge: bool = False,
+    test_channel: bool = False,
+    async_fetch: bool = True,
+    graphql_fetch: bool = False,
+    timing_summary: bool = True,
+    merge_backend: str = 'api',
+    resume: bool = False,
+    stream: bool = True
+):
+    """설정 파일의 저장소들을 동시에 처리한다. 전체 실행 시간은 가장 오래 걸리는 저장소의 시간이 된다.
+    모든 저장소가 같은 TokenPool을 사용하므로 토큰별 rate limit 예산을 함께 나눠 쓴다.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from configs import settings
+    from models import RepositoriesConfig
+    from network import HttpCache, TokenPool
+    from services import DiscordRestNotifier, RunJournal
+    from telemetry import MetricsRegistry
+    from utils import DiscordMessageBuilder
+
+    metrics = MetricsRegistry.shared()
+    config = RepositoriesConfig.parse_file(config_path)
+    tokens = config.tokens or [settings.github.SERVICE_HEADERS["Authorization"].split()[-1]]
+    tokenPool = TokenPool(tokens)
+    httpCache = HttpCache(HTTP_CACHE_DIR)
+    discordMessageBuilder = DiscordMessageBuilder()
+    discordMessageBuilder.set_skip_merge(skip_merge)
+    default_channel_id = settings.discord.CHANNEL_ID_TEST if test_channel else settings.discord.CHANNEL_ID_SERVICE
+    journals = {
+        repository.slug: RunJournal(journal_path(repository), resume=resume)
+        for repository in config.repositories
+        if not skip_merge
+    }
+    
+    with ThreadPoolExecutor(max_workers=max(1, len(config.repositories))) as executor:
+        futures = [
+            executor.submit(
+                process_repository, repository, httpCache,
+                skip_merge=skip_merge,
+                async_fetch=async_fetch,
+                graphql_fetch=graphql_fetch,
+                tokenPool=tokenPool,
+                merge_backend=merge_backend,
+                record_history=not skip_merge,
+                journal=journals.get(repository.slug),
+                stream=stream
+            )
+            for repository in config.repositories
+        ]
+    
+    reports: List[Tuple[GithubRepository, List[str]]] = []
+    # 보고서를 보낸 뒤 journal에 전송 기록을 남길 저장소. 실패한 저장소는 resume 했을 때 다시 보고한다
+    completed: List[GithubRepository] = []
+    for repository, future in zip(config.repositories, futures):
+        journal = journals.get(repository.slug)
+        if journal and journal.last("report_sent"):
+            logger.info(f"{repository.slug} report was already sent by the previous run")
+            continue
+        # 한 저장소가 실패해도 나머지 저장소의 보고서는 보낸다
+        try:
+            merge_result = future.result()
+            report = discordMessageBuilder.build_report(merge_pull_request_results=list(reversed(merge_result)))
+            completed.append(repository)
+        except Exception as ex:
+            logger.exception(ex)
+            report = [f"**{repository.slug}** 처리 실패: {ex!r}"]
+        reports.append((repository, report))
+    
+    logger.info("Sending report to Discord Bot...")
+    with metrics.span("report_send"):
+        if config.per_repository_report:
+            for repository, report in reports:
+                channel_id = default_channel_id if test_channel else repository.channel_id or default_channel_id
+                DiscordRestNotifier.bot(settings.discord.BOT_TOKEN).set_channel_id(channel_id).notify(report)
+                if repository in completed and repository.slug in journals:
+                    journals[repository.slug].write("report_sent")
+        elif reports:
+            consolidated = [line for repository, report in reports for line in (f"**[{repository.slug}]**", *report)]
+            if test_channel and timing_summary:
+                consolidated.append(metrics.summary())
+            DiscordRestNotifier.bot(settings.discord.BOT_TOKEN).set_channel_id(default_channel_id).notify(consolidated)
+            for repository in completed:
+                if repository.slug in journals:
+                    journals[repository.slug].write("report_sent")
+    
+    for journal in journals.values():
+        journal.close()
+    tokenPool.close()
+    logger.info("Report Successfully sent!")
+    
+def serve(
+    host: str = '127.0.0.1',
+    port: int = 8080,
+    secret: str | None = None,
+    test_channel: bool = False
+):
+    """Github webhook을 받아서 PR이 올라오는 대로 처리하는 상주 모드"""
+    from configs import settings
+    from network import HttpCache
+    from services import WebhookServer, PullRequestFetcher, PullRequestValidator, PullRequestMerger, DiscordRestNotifier
+    from services.pull_requests.validation_cache import ValidationCache
+    from utils import DiscordMessageBuilder
+    
+    channel_id = settings.discord.CHANNEL_ID_TEST if test_channel else settings.discord.CHANNEL_ID_SERVICE
+    pullRequestValidator = PullRequestValidator()
+    pullRequestValidator.set_cache(ValidationCache(VALIDATION_CACHE_PATH, pullRequestValidator.rules))
+    
+    server = WebhookServer(
+        fetcher=PullRequestFetcher().set_cache(HttpCache(HTTP_CACHE_DIR)),
+        validator=pullRequestValidator,
+        merger=PullRequestMerger(),
+        message_builder=DiscordMessageBuilder(),
+        notify=lambda report: DiscordRestNotifier.bot(settings.discord.BOT_TOKEN).set_channel_id(channel_id).notify(report),
+        secret=secret
+    )
+    logger.info(f"Listening for webhooks on {host}:{port}")
+    server.run(host=host, port=port)
+    
+def read_json(path: str):
+    if path == '-':
+        return json.load(sys.stdin)
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def write_json(path: str, data):
+    """dataclass 목록을 dataclasses.asdict로 바꿔서 저장. datetime은 isoformat으로 저장한다"""
+    from services.history.run_journal import encode
+
+    if path == '-':
+        json.dump(data, sys.stdout, ensure_ascii=False, default=encode, indent=2)
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, default=encode, indent=2)
+
+def repository_from_args(args: argparse.Namespace) -> GithubRepository | None:
+    from configs import settings
+
+    if args.test_repository:
+        settings.github.set_test()
+    if not args.repository:
+        return None
+    from models import GithubRepository
+    owner, _, name = args.repository.partition('/')
+    return GithubRepository(owner=owner, name=name)
+
+def load_payload(args: argparse.Namespace, repository: GithubRepository | None) -> Tuple[List[Dict], Dict]:
+    """--input으로 받은 fetch 결과를 읽는다. 없으면 Github API에서 가져온다"""
+    if args.input:
+        payload = read_json(args.input)
+        # JSON object의 key는 문자열이므로 PR 번호로 되돌린다
+        return payload["pull_requests"], {int(k): v for k, v in payload["pull_request_files"].items()}
+    from network import HttpCache
+    return fetch_repository(repository, HttpCache(HTTP_CACHE_DIR), not args.sync_fetch, args.graphql)
+
+def load_validation_result(args: argparse.Namespace, repository: GithubRepository | None) -> List[PullRequestValidationResult]:
+    """--input으로 받은 validate 결과를 읽는다. 없으면 PR을 가져와서 검사한다"""
+    if args.input:
+        from models import PullRequestValidationResult
+        return [PullRequestValidationResult.from_dict(d) for d in read_json(args.input)]
+    return validate_pull_requests(*load_payload(args, repository), repository)
+
+def print_validation_result(validation_result: List[PullRequestValidationResult]):
+    for item in validation_result:
+        pull_request = item.pull_request
+        verdict = "OK" if item.validation_result else "REJECTED"
+        print(f"#{pull_request.number} {verdict} {pull_request.user_id} {pull_request.title}")
+        for detail in item.validation_details:
+            if not detail.result:
+                print(f"    {detail.validation}: {detail.reason}")
+
+def command_fetch(args: argparse.Namespace):
+    pull_requests, pull_request_files = load_payload(args, repository_from_args(args))
+    if args.output:
+        write_json(args.output, {"pull_requests": pull_requests, "pull_request_files": pull_request_files})
+    else:
+        print(f"{len(pull_requests)} pull requests, {sum(len(f) for f in pull_request_files.values())} files")
+
+def command_validate(args: argparse.Namespace):
+    repository = repository_from_args(args)
+    validation_result = validate_pull_requests(*load_payload(args, repository), repository)
+    print_validation_result(validation_result)
+    if args.output:
+        write_json(args.output, validation_result)
+
+def command_merge(args: argparse.Namespace):
+    repository = repository_from_args(args)
+    merge_result = merge_pull_requests(load_validation_result(args, repository), repository, args.skip_merge, merge_backend=args.merge_backend)
+    for item in merge_result:
+        pull_request = item.validation.pull_request
+        print(f"#{pull_request.number} merged={item.merge.merged} {item.merge.message}")
+    if args.output:
+        write_json(args.output, merge_result)
+
+def command_report(args: argparse.Namespace):
+    from configs import settings
+    from models import MergePullRequestResult
+    from utils import DiscordMessageBuilder
+
+    merge_result = [MergePullRequestResult.from_dict(d) for d in read_json(args.input)]
+    discordMessageBuilder = DiscordMessageBuilder()
+    discordMessageBuilder.set_skip_merge(args.skip_merge)
+    report = discordMessageBuilder.build_report(merge_pull_request_results=list(reversed(merge_result)))
+    if args.dry_run:
+        print("\n".join(report))
+        return
+    from services import DiscordRestNotifier
+    channel_id = settings.discord.CHANNEL_ID_TEST if args.test_channel else settings.discord.CHANNEL_ID_SERVICE
+    DiscordRestNotifier.bot(settings.discord.BOT_TOKEN).set_channel_id(channel_id).notify(report)
+
+def command_run(args: argparse.Namespace):
+    options = dict(
+        skip_merge=args.skip_merge,
+        test_channel=args.test_channel,
+        async_fetch=not args.sync_fetch,
+        graphql_fetch=args.graphql,
+        timing_summary=not args.no_timing_summary,
+        merge_backend=args.merge_backend,
+        resume=args.resume,
+        stream=not args.no_stream
+    )
+    if args.repositories:
+        main_repositories(config_path=args.repositories, **options)
+    else:
+        main(test_repository=args.test_repository, **options)
+
+def command_serve(args: argparse.Namespace):
+    serve(host=args.host, port=args.port, secret=args.secret, test_channel=args.test_channel)
+
+def command_history(args: argparse.Namespace):
+    from services import RunHistory
+    from utils import DateUtil, Roster
+
+    if args.month:
+        period = RunHistory.month_period(args.month)
+    else:
+        period = RunHistory.week_period(args.week or DateUtil.get_weeknumber_from_startdate(DateUtil.get_report_date()))
+    runHistory = RunHistory(HISTORY_PATH)
+    roster = Roster.shared()
+    print(f"<{period}>")
+    for stats in runHistory.user_stats(period):
+        print(
+            f"{roster.name(stats['user_id']) or stats['user_id']}: 제출 {stats['submitted']}건, 성공 {stats['successful']}건, "
+            f"반려 {stats['rejected']}건, 실패 {stats['failed']}건, 연속 {runHistory.streak(stats['user_id'])}일"
+        )
+    for stats in runHistory.rule_stats(period):
+        print(f"{stats['rule']}: {stats['failures']}건")
+    runHistory.close()
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command')
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--log-file', help=f"로그 파일. 지정하지 않으면 run / serve는 {LOG_PATH}, 나머지 명령은 stderr에 쓴다")
+    github = argparse.ArgumentParser(add_help=False, parents=[common])
+    github.add_argument('--test-repository', action='store_true', help="settings.github.set_test()의 저장소를 사용한다")
+    github.add_argument('--repository', metavar='OWNER/NAME', help="settings.github 대신 처리할 저장소")
+    github.add_argument('--sync-fetch', action='store_true', help="PR 파일 목록을 하나씩 가져온다")
+    github.add_argument('--graphql', action='store_true', help="GraphQL API로 가져온다")
+
+    fetch = commands.add_parser('fetch', parents=[github], help="PR과 파일 목록을 가져온다")
+    fetch.add_argument('--output', help="가져온 결과를 저장할 JSON ('-'이면 stdout)")
+    fetch.set_defaults(func=command_fetch, input=None)
+
+    validate = commands.add_parser('validate', parents=[github], help="PR을 검사하고 결과와 이유를 출력한다")
+    validate.add_argument('--input', help="fetch --output으로 저장한 JSON. 없으면 Github API에서 가져온다")
+    validate.add_argument('--output', help="검사 결과를 저장할 JSON")
+    validate.set_defaults(func=command_validate)
+
+    merge = commands.add_parser('merge', parents=[github], help="검사를 통과한 PR을 merge한다")
+    merge.add_argument('--input', help="validate --output으로 저장한 JSON. 없으면 가져와서 검사한다")
+    merge.add_argument('--output', help="merge 결과를 저장할 JSON")
+    merge.add_argument('--skip-merge', action='store_true')
+    merge.add_argument('--merge-backend', choices=MERGE_BACKENDS, default='api')
+    merge.set_defaults(func=command_merge)
+
+    report = commands.add_parser('report', parents=[common], help="merge 결과로 보고서를 만들어서 보낸다")
+    report.add_argument('--input', required=True, help="merge --output으로 저장한 JSON ('-'이면 stdin)")
+    report.add_argument('--skip-merge', action='store_true', help="merge --skip-merge의 결과일 때 지정한다")
+    report.add_argument('--test-channel', action='store_true')
+    report.add_argument('--dry-run', action='store_true', help="보내지 않고 출력만 한다")
+    report.set_defaults(func=command_report)
+
+    run = commands.add_parser('run', parents=[common], help="fetch → validate → merge → report (기본 명령)")
+    run.add_argument('--repositories', nargs='?', const=REPOSITORIES_PATH, metavar='PATH', help="설정 파일의 저장소들을 동시에 처리한다")
+    run.add_argument('--skip-merge', action='store_true')
+    run.add_argument('--test-channel', action='store_true')
+    run.add_argument('--test-repository', action='store_true')
+    run.add_argument('--sync-fetch', action='store_true')
+    run.add_argument('--graphql', action='store_true')
+    run.add_argument('--merge-backend', choices=MERGE_BACKENDS, default='api', help="git / octopus: 로컬 mirror에서 merge하고 한 번에 push한다")
+    run.add_argument('--no-timing-summary', action='store_true')
+    run.add_argument('--resume', action='store_true', help="이전 실행이 멈춘 단계부터 다시 실행한다. merge에 성공한 PR과 보낸 보고서는 다시 처리하지 않는다")
+    run.add_argument('--no-stream', action='store_true', help="PR 하나씩 흘려보내지 않고 모든 PR을 가져온 뒤에 검사하고, 모두 검사한 뒤에 merge한다")
+    run.set_defaults(func=command_run, service=True)
+
+    serve = commands.add_parser('serve', parents=[common], help="Github webhook을 받아서 처리하는 상주 모드")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--secret')
+    serve.add_argument('--test-channel', action='store_true')
+    serve.set_defaults(func=command_serve, service=True)
+
+    history = commands.add_parser('history', parents=[common], help="기록된 결과의 주간 / 월간 집계를 출력한다")
+    period = history.add_mutually_exclusive_group()
+    period.add_argument('--week', type=int, help="주차 (기본값: 이번 주)")
+    period.add_argument('--month', metavar='YYYY-MM')
+    history.set_defaults(func=command_history)
+    return parser
+
+def cli(argv: List[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    # cron은 인자 없이 실행하므로 명령이 없으면 run으로 처리한다
+    if not argv or argv[0] not in (*COMMANDS, '-h', '--help'):
+        argv = ['run', *argv]
+    args = build_parser().parse_args(argv)
+    service = getattr(args, 'service', False)
+
     logging.basicConfig(
-        filename='/usr/share/gwichanhub/main.log',
+        filename=args.log_file or (LOG_PATH if service else None),
         encoding='utf-8',
         level=logging.INFO,
         format='%(asctime)s:%(levelname)s:%(pathname)s:%(funcName)s:%(lineno)d:%(message)s',
         datefmt='%Y-%m-%d %H:%M:%S',
     )
-    logger = logging.getLogger(__name__)
     
+    from configs import settings
     try:
         settings.update()
-        
-        main(
-            # skip_merge=True,
-            # test_channel=True
-        )
+        args.func(args)
+        return 0
         
     except Exception as ex:
+        if not service:
+            raise
         logger.exception(ex)
-        DiscordBot.bot(settings.discord.BOT_TOKEN).set_channel_id(settings.discord.CHANNEL_ID_TEST).notify([ex])
\ No newline at end of file
+        from services import DiscordRestNotifier
+        DiscordRestNotifier.bot(settings.discord.BOT_TOKEN).set_channel_id(settings.discord.CHANNEL_ID_TEST).notify([ex])
+        return 1
+        
+    finally:
+        # 실패한 실행도 어느 단계에서 시간이 걸렸는지 볼 수 있도록 항상 내보낸다
+        if service:
+            from telemetry import MetricsRegistry
+            MetricsRegistry.shared().export(METRICS_JSON_PATH, METRICS_PROMETHEUS_PATH)
+
+if __name__ == '__main__':
+    sys.exit(cli())
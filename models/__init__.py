@@ -1,8 +1,21 @@
-from .pull_request import PullRequest
-from .base_request import BaseRequest
-from .pull_request_validation_result import PullRequestValidationResult
-from .validation_result import ValidationResult
-from .merge_result import MergeResult
-from .merge_pull_request_result import MergePullRequestResult
-from .message_type import MessageType
-from .commit_file import CommitFile
\ No newline at end of file
+from utils.lazy_module import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "PullRequest": ".pull_request",
+    "BaseRequest": ".base_request",
+    "PullRequestValidationResult": ".pull_request_validation_result",
+    "ValidationResult": ".validation_result",
+    "MergeResult": ".merge_result",
+    "MergePullRequestResult": ".merge_pull_request_result",
+    "MessageType": ".message_type",
+    "CommitFile": ".commit_file",
+    "CommitFileBatch": ".commit_file",
+    "PullRequestPayload": ".github_payloads",
+    "PullRequestFilePayload": ".github_payloads",
+    "MergeResponsePayload": ".github_payloads",
+    "Fields": ".github_payloads",
+    "fields_of": ".github_payloads",
+    "project": ".github_payloads",
+    "GithubRepository": ".github_repository",
+    "RepositoriesConfig": ".github_repository",
+})
\ No newline at end of file
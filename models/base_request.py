@@ -1,31 +1,229 @@
 
 import requests
+import aiohttp
+import asyncio
 import json
-import logging
-from pydantic import BaseModel
 import time
-from typing import Dict
+import logging
+from pydantic import BaseModel, Field
+from typing_extensions import Self
+from typing import Any, Dict, Iterator, AsyncIterator, List, Mapping, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from network import HttpCache, HttpTransport, HttpStatusError, TokenPool
+from configs import settings
+from telemetry import MetricsRegistry, HTTP_REQUEST_SECONDS, RATELIMIT_REMAINING
+from .github_repository import GithubRepository
+from .github_payloads import Fields, project
 log = logging.getLogger(__name__)
 
+# Github API가 허용하는 페이지당 최대 항목 수
+MAX_PER_PAGE = 100
+
+def with_per_page(url: str, per_page: int = MAX_PER_PAGE) -> str:
+    scheme, netloc, path, query, fragment = urlsplit(url)
+    params = dict(parse_qsl(query))
+    params["per_page"] = str(per_page)
+    return urlunsplit((scheme, netloc, path, urlencode(params), fragment))
+
+def next_link(link_header: str | None) -> str | None:
+    for link in requests.utils.parse_header_links(link_header or ""):
+        if link.get("rel") == "next":
+            return link.get("url")
+    return None
+
 class BaseRequest(BaseModel):
-    sleeptime: float
     headers: Dict[str, str]
-    def request(self, method: str, url: str) -> Dict:
-        time.sleep(self.sleeptime)
+    # RateLimiter의 lane. merge 처럼 secondary rate limit에 민감한 요청은 별도 lane을 사용한다
+    lane: str = "default"
+    cache: HttpCache | None = None
+    transport: HttpTransport = Field(default_factory=HttpTransport.shared)
+    metrics: MetricsRegistry = Field(default_factory=MetricsRegistry.shared)
+    # None이면 settings.github의 저장소를 사용한다
+    repository: GithubRepository | None = None
+    # 지정하면 transport 대신 요청마다 token pool에서 고른 토큰과 그 토큰의 transport를 사용한다
+    tokens: TokenPool | None = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def set_cache(self, cache: HttpCache | None) -> Self:
+        self.cache = cache
+        return self
+
+    def set_transport(self, transport: HttpTransport) -> Self:
+        self.transport = transport
+        return self
+
+    def set_metrics(self, metrics: MetricsRegistry) -> Self:
+        self.metrics = metrics
+        return self
+
+    def set_repository(self, repository: GithubRepository | None) -> Self:
+        self.repository = repository
+        return self
+
+    def set_token_pool(self, tokens: TokenPool | None) -> Self:
+        self.tokens = tokens
+        return self
+
+    def github(self) -> GithubRepository:
+        return self.repository or settings.github
+
+    def route(self, method: str, url: str, conditional: bool = True) -> Tuple[HttpTransport, Dict[str, str]]:
+        """요청을 보낼 transport와 헤더. conditional이 False면 캐시의 조건부 헤더를 붙이지 않는다"""
+        headers = self.request_headers(method, url, conditional)
+        if self.tokens is None:
+            return self.transport, headers
+        token, transport = self.tokens.pick()
+        return transport, {**headers, **TokenPool.authorization(token)}
+
+    def observe_call(self, method: str, status: int | str, start: float, headers: Mapping[str, str] | None = None):
+        """재시도를 포함한 호출 하나의 소요 시간, 최종 상태 코드, 남은 rate limit을 기록"""
+        self.metrics.observe(
+            HTTP_REQUEST_SECONDS, time.perf_counter() - start,
+            method=method.upper(), lane=self.lane, status=status
+        )
+        if headers and (remaining := headers.get("X-RateLimit-Remaining")) is not None:
+            self.metrics.set(RATELIMIT_REMAINING, int(remaining))
+
+    def request_headers(self, method: str, url: str, conditional: bool = True) -> Dict[str, str]:
+        if self.cache is None or method.lower() != "get" or not conditional:
+            return self.headers
+        return {**self.headers, **self.cache.conditional_headers(url)}
+
+    def send(self, method: str, url: str, conditional: bool = True, retries: int | None = None, **kwargs) -> requests.Response:
+        """요청을 보내고 상태 코드를 검사한다. 2xx가 아니면 HttpStatusError를 발생시킨다.
+        retries가 None이면 HttpTransport.retries_for(method)만큼 재시도한다. kwargs(ex. json=)는 requests에 그대로 전달된다.
+        """
+        transport, headers = self.route(method, url, conditional)
+        start = time.perf_counter()
+        try:
+            res = transport.send(method, url, headers=headers, lane=self.lane, retries=retries, **kwargs)
+        except requests.RequestException:
+            self.observe_call(method, "error", start)
+            raise
+        self.observe_call(method, res.status_code, start, res.headers)
+        if self.cache is not None and method.lower() == "get":
+            self.apply_cache(url, res)
+        if res.status_code == 304:
+            # 조건부 요청을 보낸 뒤에 캐시 항목이 지워졌으면(다른 thread의 eviction, 깨진 파일) 본문을 다시 받는다
+            if conditional:
+                log.info(f"Cached response for {url} is gone. Fetching again...")
+                return self.send(method, url, conditional=False, retries=retries, **kwargs)
+            raise HttpStatusError(method, url, res.status_code, {})
+        if not res.ok:
+            raise HttpStatusError(method, url, res.status_code, self.decode(res.content))
+        return res
+
+    @staticmethod
+    def decode(content: bytes) -> Any:
         try:
-            res = None
-            if method.lower() == "get":
-                res = requests.get(url, headers=self.headers)
-            elif method.lower() == "put":
-                res = requests.put(url, headers=self.headers)
-            return {} if res is None else json.loads(res.content)
-        
-        except (
-            requests.exceptions.Timeout,
-            requests.exceptions.ConnectionError,
-            requests.exceptions.HTTPError,
-            requests.exceptions.RequestException
-        ) as ex:
-            log.warning(ex)
+            return json.loads(content) if content else {}
+        except ValueError:
             return {}
 
+    def apply_cache(self, url: str, res: requests.Response):
+        """304 응답이면 캐시에 저장된 본문으로 채우고, 새 응답이면 캐시에 저장"""
+        if res.status_code == 304:
+            entry = self.cache.revalidated(url)
+            if entry is not None:
+                res.status_code = 200
+                res._content = entry.body.encode("utf-8")
+                if entry.link:
+                    res.headers["Link"] = entry.link
+        elif res.ok:
+            self.cache.store(url, res.headers, res.content)
+
+    def request(self, method: str, url: str, **kwargs) -> Dict:
+        return self.decode(self.send(method, url, **kwargs).content)
+
+    @staticmethod
+    def decode_page(url: str, content: bytes, fields: Fields | None = None) -> List[Dict] | None:
+        """목록 API의 한 페이지를 디코딩하고 fields가 있으면 그 field만 남긴다. 목록이 아니면 None"""
+        page = json.loads(content)
+        if not isinstance(page, list):
+            log.warning(f"Unexpected page from {url}: {page}")
+            return None
+        if fields is None:
+            return page
+        return [project(item, fields) for item in page]
+
+    def paginate(self, url: str, fields: Fields | None = None) -> Iterator[Dict]:
+        """Link 헤더의 rel="next"를 따라가며 목록 API의 항목을 페이지가 도착하는 대로 하나씩 반환.
+        fields를 지정하면 항목마다 그 field만 남기고, 응답 본문은 항목을 반환하기 전에 놓는다.
+        """
+        next_url = with_per_page(url)
+        while next_url:
+            res = self.send('get', next_url)
+            page = self.decode_page(next_url, res.content, fields)
+            next_url = res.links.get("next", {}).get("url")
+            # 항목을 받는 쪽이 다음 페이지를 요청할 때까지 원본 응답을 붙잡고 있지 않도록 한다
+            del res
+            if page is None:
+                return
+            yield from page
+
+    async def send_async(self, session: aiohttp.ClientSession, method: str, url: str) -> Tuple[bytes, str | None]:
+        """send의 비동기 버전. (본문, 다음 페이지 url)을 반환한다. 대기가 이벤트 루프를 막지 않는다."""
+        retries = self.transport.retries_for(method)
+        attempt = 0
+        start = time.perf_counter()
+        conditional = True
+        while True:
+            transport, headers = self.route(method, url, conditional)
+            limiter = transport.limiter
+            await limiter.acquire_async(self.lane)
+            try:
+                async with session.request(
+                    method.upper(), url,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(connect=transport.timeout[0], sock_read=transport.timeout[1])
+                ) as res:
+                    body = await res.read()
+                    status, link = res.status, res.headers.get("Link")
+                    limiter.observe(status, res.headers)
+                    if self.cache is not None and method.lower() == "get":
+                        if status == 304 and (entry := self.cache.revalidated(url)) is not None:
+                            status, body, link = 200, entry.body.encode("utf-8"), entry.link
+                        elif 200 <= status < 300:
+                            self.cache.store(url, res.headers, body)
+                if status == 304 and conditional:
+                    # send와 같이 캐시 항목이 지워졌으면 조건부 헤더 없이 다시 요청한다
+                    log.info(f"Cached response for {url} is gone. Fetching again...")
+                    conditional = False
+                    continue
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as ex:
+                if attempt >= retries:
+                    self.observe_call(method, "error", start)
+                    raise
+                log.warning(f"{method.upper()} {url} failed ({ex!r}), retrying")
+            else:
+                if 200 <= status < 300:
+                    self.observe_call(method, status, start, res.headers)
+                    return body, next_link(link)
+                if limiter.is_rate_limited(status, res.headers) and attempt < transport.max_retries:
+                    attempt += 1
+                    continue
+                if status not in transport.RETRY_STATUSES or attempt >= retries:
+                    self.observe_call(method, status, start, res.headers)
+                    raise HttpStatusError(method, url, status, self.decode(body))
+                log.warning(f"{method.upper()} {url} returned HTTP {status}, retrying")
+            await asyncio.sleep(transport.retry_delay(attempt))
+            attempt += 1
+
+    async def request_async(self, session: aiohttp.ClientSession, method: str, url: str) -> Dict:
+        body, _ = await self.send_async(session, method, url)
+        return self.decode(body)
+
+    async def paginate_async(self, session: aiohttp.ClientSession, url: str, fields: Fields | None = None) -> AsyncIterator[Dict]:
+        """paginate의 비동기 버전"""
+        next_url = with_per_page(url)
+        while next_url:
+            page_url = next_url
+            body, next_url = await self.send_async(session, 'get', page_url)
+            page = self.decode_page(page_url, body, fields)
+            del body
+            if page is None:
+                return
+            for item in page:
+                yield item
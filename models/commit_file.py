@@ -1,8 +1,9 @@
-from pydantic import BaseModel
-from typing import List
+from dataclasses import dataclass
+from typing import Iterator, Tuple
 
-class CommitFile(BaseModel):
-    path: List[str] | None = None
+@dataclass(slots=True)
+class CommitFile:
+    path: Tuple[str, ...] | None = None
     filename: str | None = None
     extension: str | None = None
     prefix: str = ""
@@ -16,3 +17,24 @@ class CommitFile(BaseModel):
     def toFullString(self):
         return f"{self.pathToString()}/{self.toString()}" if self.path else self.toString()
 
+@dataclass(slots=True)
+class CommitFileBatch:
+    """한 Pull Request의 파일 목록을 열 단위로 저장한 것. CommitFile 리스트처럼 순회할 수 있다"""
+    paths: Tuple[Tuple[str, ...], ...] = ()
+    prefixes: Tuple[str, ...] = ()
+    filenames: Tuple[str, ...] = ()
+    extensions: Tuple[str | None, ...] = ()
+
+    def __len__(self) -> int:
+        return len(self.filenames)
+    
+    def __getitem__(self, i: int) -> CommitFile:
+        return CommitFile(
+            path=self.paths[i],
+            filename=self.filenames[i],
+            extension=self.extensions[i],
+            prefix=self.prefixes[i]
+        )
+    
+    def __iter__(self) -> Iterator[CommitFile]:
+        return map(CommitFile, self.paths, self.filenames, self.extensions, self.prefixes)
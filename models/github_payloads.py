@@ -0,0 +1,69 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, List, Type
+import pytz
+
+from .pull_request import PullRequest
+from .merge_result import MergeResult
+
+# Github API 응답을 검증하는 모델. 검증이 끝나면 가벼운 내부 모델(PullRequest, MergeResult)로 변환한다
+
+class UserPayload(BaseModel):
+    login: str
+
+class LabelPayload(BaseModel):
+    name: str
+
+class HeadPayload(BaseModel):
+    sha: str = ""
+
+class PullRequestFilePayload(BaseModel):
+    filename: str
+    status: str
+
+class PullRequestPayload(BaseModel):
+    number: int
+    title: str
+    user: UserPayload
+    created_at: datetime
+    labels: List[LabelPayload] = []
+    head: HeadPayload = HeadPayload()
+
+    def to_pull_request(self, files: List[PullRequestFilePayload]) -> PullRequest:
+        return PullRequest(
+            number=self.number,
+            title=self.title,
+            user_id=self.user.login,
+            created_at=self.created_at.astimezone(pytz.timezone('Asia/Seoul')),
+            labels=[l.name for l in self.labels],
+            files=[f.filename for f in files if f.status != "removed"],
+            head_sha=self.head.sha
+        )
+
+# Payload 모델이 읽는 field. {field 이름: None(값 그대로) | 하위 객체의 Fields}
+Fields = Dict[str, "Fields | None"]
+
+def fields_of(model: Type[BaseModel]) -> Fields:
+    """model을 검증할 때 읽는 field만 남기는 projection. List[Model]은 각 항목에 하위 projection을 적용한다"""
+    return {
+        field.alias: fields_of(field.type_) if isinstance(field.type_, type) and issubclass(field.type_, BaseModel) else None
+        for field in model.__fields__.values()
+    }
+
+def project(value: Any, fields: Fields | None) -> Any:
+    """value에서 fields에 있는 key만 남긴 사본. 나머지(ex. head.repo, base, patch)는 버린다"""
+    if fields is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, fields) for item in value]
+    if isinstance(value, dict):
+        return {key: project(value[key], sub) for key, sub in fields.items() if key in value}
+    return value
+
+class MergeResponsePayload(BaseModel):
+    sha: str | None = ""
+    merged: bool = False
+    message: str = ""
+
+    def to_merge_result(self) -> MergeResult:
+        return MergeResult(sha=self.sha or "", merged=self.merged, message=self.message)
@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+from typing import List
+
+class GithubRepository(BaseModel):
+    """처리할 저장소. url_* 메소드는 settings.github와 같아서 settings.github 대신 사용할 수 있다."""
+    owner: str
+    name: str
+    api_url: str = "https://api.github.com"
+    # 저장소별 보고서를 보낼 채널. 없으면 기본 채널로 보낸다
+    channel_id: int | None = None
+
+    @property
+    def slug(self) -> str:
+        return f"{self.owner}/{self.name}"
+
+    def url_repository(self) -> str:
+        return f"{self.api_url.rstrip('/')}/repos/{self.owner}/{self.name}"
+
+    def url_pull_requests(self) -> str:
+        return f"{self.url_repository()}/pulls"
+
+    def url_pull_request_files(self, pull_number: int) -> str:
+        return f"{self.url_repository()}/pulls/{pull_number}/files"
+
+    def url_merge_pull_request(self, pull_number: int) -> str:
+        return f"{self.url_repository()}/pulls/{pull_number}/merge"
+
+class RepositoriesConfig(BaseModel):
+    """여러 저장소를 한 번에 처리할 때 읽는 설정 파일
+
+    {
+        "tokens": ["ghp_...", "ghp_..."],
+        "per_repository_report": false,
+        "repositories": [{"owner": "it-e-7", "name": "Algorithm", "channel_id": 123}]
+    }
+    """
+    # 비어있으면 settings.github.SERVICE_HEADERS의 토큰을 사용한다
+    tokens: List[str] = []
+    # true면 저장소마다 보고서를 따로 보내고, false면 하나로 합쳐서 보낸다
+    per_repository_report: bool = False
+    repositories: List[GithubRepository]
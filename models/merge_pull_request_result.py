@@ -1,8 +1,17 @@
 
-from pydantic import BaseModel
+from dataclasses import dataclass
+from typing import Dict
 from .merge_result import MergeResult
 from .pull_request_validation_result import PullRequestValidationResult
 
-class MergePullRequestResult(BaseModel):
+@dataclass(slots=True)
+class MergePullRequestResult:
     merge: MergeResult
-    validation: PullRequestValidationResult
\ No newline at end of file
+    validation: PullRequestValidationResult
+    
+    @staticmethod
+    def from_dict(d: Dict) -> "MergePullRequestResult":
+        return MergePullRequestResult(
+            merge=MergeResult(**d["merge"]),
+            validation=PullRequestValidationResult.from_dict(d["validation"])
+        )
\ No newline at end of file
@@ -1,7 +1,8 @@
 
-from pydantic import BaseModel
+from dataclasses import dataclass
 
-class MergeResult(BaseModel):
+@dataclass(slots=True)
+class MergeResult:
     sha: str = ""
     merged: bool = False
     message: str = ""
@@ -1,12 +1,22 @@
 
-from pydantic import BaseModel
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List
+from typing import Dict, List
 
-class PullRequest(BaseModel):
+@dataclass(slots=True)
+class PullRequest:
     number: int
     title: str
     user_id: str
     created_at: datetime
     labels: List[str]
-    files: List[str]
\ No newline at end of file
+    files: List[str]
+    head_sha: str = ""
+    
+    @staticmethod
+    def from_dict(d: Dict) -> "PullRequest":
+        """dataclasses.asdict로 저장한 값을 다시 읽는다. created_at은 isoformat 문자열이어도 된다"""
+        created_at = d["created_at"]
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        return PullRequest(**{**d, "created_at": created_at})
\ No newline at end of file
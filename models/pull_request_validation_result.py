@@ -1,10 +1,19 @@
 
-from pydantic import BaseModel
-from typing import List
+from dataclasses import dataclass
+from typing import Dict, List
 from .pull_request import PullRequest
 from .validation_result import ValidationResult
 
-class PullRequestValidationResult(BaseModel):
+@dataclass(slots=True)
+class PullRequestValidationResult:
     pull_request: PullRequest
     validation_result: bool
-    validation_details: List[ValidationResult]
\ No newline at end of file
+    validation_details: List[ValidationResult]
+    
+    @staticmethod
+    def from_dict(d: Dict) -> "PullRequestValidationResult":
+        return PullRequestValidationResult(
+            pull_request=PullRequest.from_dict(d["pull_request"]),
+            validation_result=d["validation_result"],
+            validation_details=[ValidationResult(**v) for v in d["validation_details"]]
+        )
\ No newline at end of file
@@ -1,5 +1,7 @@
-from pydantic import BaseModel
-class ValidationResult(BaseModel):
+from dataclasses import dataclass
+
+@dataclass(slots=True)
+class ValidationResult:
     validation: str
     result: bool
     reason: str
\ No newline at end of file
@@ -0,0 +1,4 @@
+from .rate_limiter import RateLimiter, TokenBucket
+from .http_cache import HttpCache, CacheEntry
+from .http_transport import HttpTransport, HttpStatusError
+from .token_pool import TokenPool
\ No newline at end of file
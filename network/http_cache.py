@@ -0,0 +1,136 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Mapping
+from pydantic import BaseModel
+log = logging.getLogger(__name__)
+
+class CacheEntry(BaseModel):
+    url: str
+    etag: str | None = None
+    last_modified: str | None = None
+    link: str | None = None
+    body: str = ""
+
+class HttpCache:
+    """URL 단위의 조건부 요청(ETag / Last-Modified) 캐시.
+
+    응답 본문은 디스크에 URL별 파일로 저장하고, 전체 크기가 max_bytes를 넘으면
+    가장 오래 사용하지 않은 항목부터 지운다. 304 응답은 Github rate limit에 포함되지 않는다.
+    """
+    INDEX_FILENAME = "index.json"
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key -> size. 앞쪽일수록 오래전에 사용한 항목
+        self._index: OrderedDict[str, int] = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha1(url.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, self.INDEX_FILENAME), encoding="utf-8") as f:
+                self._index = OrderedDict(json.load(f))
+        except (OSError, ValueError):
+            self._index = OrderedDict()
+
+    def _save_index(self):
+        path = os.path.join(self.directory, self.INDEX_FILENAME)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(list(self._index.items()), f)
+        os.replace(f"{path}.tmp", path)
+
+    def _evict(self):
+        total = sum(self._index.values())
+        while total > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            total -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def get(self, url: str) -> CacheEntry | None:
+        key = self.key(url)
+        with self._lock:
+            if key not in self._index:
+                return None
+            try:
+                entry = CacheEntry.parse_file(self._path(key))
+            except (OSError, ValueError):
+                self._index.pop(key, None)
+                return None
+            self._index.move_to_end(key)
+            return entry
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """다음 요청에 붙일 If-None-Match / If-Modified-Since 헤더. 저장된 응답이 없으면 miss로 센다"""
+        entry = self.get(url)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return {}
+        if entry.etag:
+            return {"If-None-Match": entry.etag}
+        if entry.last_modified:
+            return {"If-Modified-Since": entry.last_modified}
+        return {}
+
+    def store(self, url: str, headers: Mapping[str, str], body: bytes):
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        entry = CacheEntry(
+            url=url,
+            etag=etag,
+            last_modified=last_modified,
+            link=headers.get("Link"),
+            body=body.decode("utf-8")
+        )
+        data = entry.json()
+        key = self.key(url)
+        with self._lock:
+            with open(self._path(key), "w", encoding="utf-8") as f:
+                f.write(data)
+            self._index[key] = len(data)
+            self._index.move_to_end(key)
+            self._evict()
+            self._save_index()
+
+    def revalidated(self, url: str) -> CacheEntry | None:
+        """304 응답을 받았을 때 저장해둔 응답을 반환. 그 사이에 지워졌으면 miss로 센다"""
+        entry = self.get(url)
+        with self._lock:
+            if entry is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._index),
+            "bytes": sum(self._index.values()),
+        }
+
+    def log_stats(self):
+        log.info(f"HTTP cache stats: {self.stats()}")
@@ -0,0 +1,105 @@
+import random
+import time
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any
+from .rate_limiter import RateLimiter
+log = logging.getLogger(__name__)
+
+class HttpStatusError(Exception):
+    """2xx/304 이외의 상태 코드를 받았을 때 발생"""
+    def __init__(self, method: str, url: str, status: int, body: Any = None):
+        self.method = method
+        self.url = url
+        self.status = status
+        self.body = body
+        super().__init__(f"{method.upper()} {url} returned HTTP {status}")
+
+    @property
+    def message(self) -> str:
+        if isinstance(self.body, dict) and self.body.get("message"):
+            return self.body["message"]
+        return f"HTTP {self.status}"
+
+class HttpTransport:
+    """한 번의 실행 동안 공유하는 keep-alive 커넥션 풀.
+
+    멱등 요청(GET 등)은 연결 오류나 5xx 응답에 대해 지수 백오프 + jitter로 재시도한다.
+    GraphQL 조회처럼 POST지만 읽기만 하는 요청은 send의 retries로 재시도 횟수를 지정한다.
+    rate limit에 걸린 요청은 실행되지 않았으므로 메소드와 상관없이 limiter가 허용하는 시각에 다시 보낸다.
+    """
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+    RETRY_STATUSES = {500, 502, 503, 504}
+
+    _shared: "HttpTransport | None" = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        pool_maxsize: int = 16,
+        connect_timeout: float = 5,
+        read_timeout: float = 30,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        backoff_max: float = 8,
+        limiter: RateLimiter | None = None
+    ):
+        self.limiter = limiter or RateLimiter()
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def shared(cls) -> "HttpTransport":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def retries_for(self, method: str) -> int:
+        return self.max_retries if method.upper() in self.IDEMPOTENT_METHODS else 0
+
+    def retry_delay(self, attempt: int) -> float:
+        # full jitter: [0, min(backoff_max, backoff * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str] | None = None,
+        lane: str = "default",
+        retries: int | None = None,
+        **kwargs
+    ) -> requests.Response:
+        if retries is None:
+            retries = self.retries_for(method)
+        attempt = 0
+        while True:
+            self.limiter.acquire(lane)
+            try:
+                res = self.session.request(method.upper(), url, headers=headers, timeout=self.timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as ex:
+                if attempt >= retries:
+                    raise
+                log.warning(f"{method.upper()} {url} failed ({ex}), retrying")
+            else:
+                self.limiter.observe(res.status_code, res.headers)
+                if RateLimiter.is_rate_limited(res.status_code, res.headers) and attempt < self.max_retries:
+                    attempt += 1
+                    continue
+                if res.status_code not in self.RETRY_STATUSES or attempt >= retries:
+                    return res
+                log.warning(f"{method.upper()} {url} returned HTTP {res.status_code}, retrying")
+            time.sleep(self.retry_delay(attempt))
+            attempt += 1
+
+    def close(self):
+        self.session.close()
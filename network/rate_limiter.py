@@ -0,0 +1,103 @@
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Mapping
+from telemetry import MetricsRegistry, RATELIMIT_WAIT_SECONDS
+log = logging.getLogger(__name__)
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 토큰 버킷"""
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """토큰 하나를 예약하고, 그 토큰을 쓸 수 있을 때까지 기다려야 하는 시간을 반환"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+class RateLimiter:
+    """Github rate limit 헤더를 보고 요청 속도를 조절한다.
+
+    남은 요청 수가 충분하면 lane별 토큰 버킷 속도로 바로 보내고, low_watermark 아래로
+    내려가면 reset 시각까지 남은 요청을 고르게 나눠서 보낸다. 동시에 부른 thread들도 next_slot부터
+    차례로 한 칸씩 받으므로 한꺼번에 보내지 않는다.
+    Retry-After나 남은 요청이 0인 403/429 응답을 받으면 해당 시각까지 모든 요청을 멈춘다.
+    """
+    # lane 이름: (초당 요청 수, 최대 burst)
+    DEFAULT_LANES = {
+        "default": (10.0, 100),
+        # merge 같은 content 생성 요청은 secondary rate limit을 피하기 위해 1초에 1번만 보낸다
+        "merge": (1.0, 1),
+    }
+
+    def __init__(
+        self,
+        lanes: Dict[str, tuple] | None = None,
+        low_watermark: int = 100,
+        metrics: MetricsRegistry | None = None
+    ):
+        self.low_watermark = low_watermark
+        self.metrics = metrics or MetricsRegistry.shared()
+        self.lanes = {
+            name: TokenBucket(rate, capacity)
+            for name, (rate, capacity) in (lanes or self.DEFAULT_LANES).items()
+        }
+        self.remaining: int | None = None
+        self.reset_at: float | None = None  # time.time() 기준
+        self.blocked_until = 0.0            # time.time() 기준
+        self.next_slot = 0.0                # time.time() 기준. low_watermark 아래에서 다음 요청을 보낼 시각
+        self._lock = threading.Lock()
+
+    def delay(self, lane: str = "default") -> float:
+        with self._lock:
+            now = time.time()
+            bucket = self.lanes.get(lane) or self.lanes["default"]
+            wait = bucket.reserve(time.monotonic())
+            wait = max(wait, self.blocked_until - now)
+            if self.remaining is not None and self.reset_at is not None and self.reset_at > now:
+                if self.remaining <= 0:
+                    wait = max(wait, self.reset_at - now)
+                elif self.remaining < self.low_watermark:
+                    slot = max(now, self.next_slot)
+                    self.next_slot = slot + (self.reset_at - slot) / self.remaining
+                    wait = max(wait, slot - now)
+                    self.remaining -= 1
+            return max(0.0, wait)
+
+    def acquire(self, lane: str = "default"):
+        if (wait := self.delay(lane)) > 0:
+            self.metrics.observe(RATELIMIT_WAIT_SECONDS, wait, lane=lane)
+            time.sleep(wait)
+
+    async def acquire_async(self, lane: str = "default"):
+        if (wait := self.delay(lane)) > 0:
+            self.metrics.observe(RATELIMIT_WAIT_SECONDS, wait, lane=lane)
+            await asyncio.sleep(wait)
+
+    def observe(self, status: int, headers: Mapping[str, str]):
+        """응답의 X-RateLimit-Remaining / X-RateLimit-Reset / Retry-After 반영"""
+        with self._lock:
+            now = time.time()
+            if (remaining := headers.get("X-RateLimit-Remaining")) is not None:
+                self.remaining = int(remaining)
+            if (reset := headers.get("X-RateLimit-Reset")) is not None:
+                self.reset_at = float(reset)
+            if (retry_after := headers.get("Retry-After")) is not None:
+                self.blocked_until = max(self.blocked_until, now + float(retry_after))
+            elif self.is_rate_limited(status, headers) and self.reset_at:
+                self.blocked_until = max(self.blocked_until, self.reset_at)
+        if self.blocked_until > now:
+            log.warning(f"Rate limited. Waiting {self.blocked_until - now:.1f}s")
+
+    @staticmethod
+    def is_rate_limited(status: int, headers: Mapping[str, str]) -> bool:
+        return status in (403, 429) and (
+            headers.get("Retry-After") is not None
+            or headers.get("X-RateLimit-Remaining") == "0"
+        )
@@ -0,0 +1,42 @@
+import time
+import threading
+from typing import Dict, List, Tuple
+from .http_transport import HttpTransport
+
+class TokenPool:
+    """여러 Github 토큰의 rate limit 예산을 나눠 쓴다.
+
+    Github rate limit은 토큰마다 따로 계산되므로 토큰마다 HttpTransport(와 RateLimiter)를 하나씩 둔다.
+    여러 저장소의 요청이 같은 TokenPool을 공유하면 같은 토큰의 예산을 함께 쓰고,
+    토큰이 여러 개면 요청마다 남은 요청 수가 가장 많은 토큰을 고른다.
+    """
+    def __init__(self, tokens: List[str], **transport_kwargs):
+        if not tokens:
+            raise ValueError("TokenPool needs at least one token")
+        self.tokens = list(tokens)
+        self.transports: Dict[str, HttpTransport] = {
+            token: HttpTransport(**transport_kwargs) for token in self.tokens
+        }
+        self.used: Dict[str, int] = {token: 0 for token in self.tokens}
+        self._lock = threading.Lock()
+
+    def score(self, token: str, now: float) -> Tuple[bool, float, int]:
+        """정렬 기준: 막혀있지 않은 토큰 > 남은 요청 수가 많은 토큰 > 이번 실행에서 적게 쓴 토큰"""
+        limiter = self.transports[token].limiter
+        remaining = float("inf") if limiter.remaining is None else limiter.remaining
+        return (limiter.blocked_until <= now, remaining, -self.used[token])
+
+    def pick(self) -> Tuple[str, HttpTransport]:
+        with self._lock:
+            now = time.time()
+            token = max(self.tokens, key=lambda t: self.score(t, now))
+            self.used[token] += 1
+            return token, self.transports[token]
+
+    @staticmethod
+    def authorization(token: str) -> Dict[str, str]:
+        return {"Authorization": f"token {token}"}
+
+    def close(self):
+        for transport in self.transports.values():
+            transport.close()
@@ -1,2 +1,16 @@
-from .pull_requests import PullRequestFetcher, PullRequestParser, PullRequestValidator, PullRequestMerger
-from .notifiers import DiscordBot
\ No newline at end of file
+from utils.lazy_module import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "PullRequestFetcher": ".pull_requests",
+    "PullRequestGraphQLFetcher": ".pull_requests",
+    "PullRequestParser": ".pull_requests",
+    "PullRequestValidator": ".pull_requests",
+    "PullRequestMerger": ".pull_requests",
+    "PullRequestGitMerger": ".pull_requests",
+    "PullRequestPipeline": ".pull_requests",
+    "DiscordBot": ".notifiers",
+    "DiscordRestNotifier": ".notifiers",
+    "WebhookServer": ".webhooks",
+    "RunHistory": ".history",
+    "RunJournal": ".history",
+})
\ No newline at end of file
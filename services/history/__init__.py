@@ -0,0 +1,6 @@
+from utils.lazy_module import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "RunHistory": ".run_history",
+    "RunJournal": ".run_journal",
+})
@@ -0,0 +1,278 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from models import MergePullRequestResult
+from utils import DateUtil, Roster
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    repository TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    report_date TEXT NOT NULL,
+    week INTEGER NOT NULL,
+    month TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pull_request_results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    repository TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    name TEXT,
+    title TEXT NOT NULL,
+    head_sha TEXT NOT NULL,
+    report_date TEXT NOT NULL,
+    week INTEGER NOT NULL,
+    month TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    merge_sha TEXT NOT NULL,
+    merge_message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pull_request_results_run ON pull_request_results (run_id);
+CREATE INDEX IF NOT EXISTS pull_request_results_user_date ON pull_request_results (user_id, report_date);
+CREATE INDEX IF NOT EXISTS pull_request_results_week ON pull_request_results (week);
+CREATE TABLE IF NOT EXISTS rule_failures (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    repository TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    week INTEGER NOT NULL,
+    month TEXT NOT NULL,
+    rule TEXT NOT NULL,
+    reason TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rule_failures_rule_week ON rule_failures (rule, week);
+CREATE INDEX IF NOT EXISTS rule_failures_user ON rule_failures (user_id, week);
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id TEXT NOT NULL,
+    period TEXT NOT NULL,
+    submitted INTEGER NOT NULL DEFAULT 0,
+    successful INTEGER NOT NULL DEFAULT 0,
+    rejected INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    last_report_date TEXT NOT NULL,
+    PRIMARY KEY (user_id, period)
+);
+CREATE INDEX IF NOT EXISTS user_stats_period ON user_stats (period);
+CREATE TABLE IF NOT EXISTS rule_stats (
+    rule TEXT NOT NULL,
+    period TEXT NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (rule, period)
+);
+CREATE INDEX IF NOT EXISTS rule_stats_period ON rule_stats (period);
+CREATE TABLE IF NOT EXISTS counted_pull_requests (
+    repository TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    head_sha TEXT NOT NULL,
+    period TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    rules TEXT NOT NULL,
+    PRIMARY KEY (repository, number, head_sha, period)
+);
+CREATE TABLE IF NOT EXISTS user_days (
+    user_id TEXT NOT NULL,
+    report_date TEXT NOT NULL,
+    PRIMARY KEY (user_id, report_date)
+);
+"""
+
+OUTCOMES = ("successful", "rejected", "failed")
+
+def outcome(result: MergePullRequestResult) -> str:
+    """DiscordMessageBuilder.count_cases와 같은 기준으로 성공 / 반려 / 실패를 나눈다"""
+    if result.merge.merged:
+        return "successful"
+    if not result.validation.validation_result:
+        return "rejected"
+    return "failed"
+
+class RunHistory:
+    """실행마다 PR별 검사 / merge 결과를 SQLite에 쌓아두는 기록 저장소.
+
+    pull_request_results / rule_failures는 추가만 하고, 같은 트랜잭션에서 사용자별 / 규칙별 집계를
+    주차(`week:N`, DateUtil.get_weeknumber_from_startdate)와 월(`month:YYYY-MM`) 단위로 갱신한다.
+    반려 / 실패한 PR은 열린 채로 남아서 다음 실행에도 기록되므로, 집계에는 PR(저장소, 번호, head SHA)을
+    기간마다 한 번만 세고(counted_pull_requests) 다시 기록되면 결과가 바뀐 만큼만 반영한다.
+    주간 / 월간 보고서는 집계 테이블만 읽으므로 기록이 쌓여도 조회 비용이 늘지 않는다.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    @staticmethod
+    def week_period(week: int) -> str:
+        return f"week:{week}"
+
+    @staticmethod
+    def month_period(month: str) -> str:
+        return f"month:{month}"
+
+    def record(
+        self,
+        merge_pull_request_results: List[MergePullRequestResult],
+        repository: str = "",
+        report_date: datetime | None = None
+    ) -> int:
+        """한 번의 실행 결과를 기록하고 run id를 반환"""
+        report_date = report_date or DateUtil.get_report_date()
+        day = report_date.strftime("%Y-%m-%d")
+        week = DateUtil.get_weeknumber_from_startdate(report_date)
+        month = report_date.strftime("%Y-%m")
+        periods = (self.week_period(week), self.month_period(month))
+        roster = Roster.shared()
+
+        results, failures, merged_users = [], [], set()
+        for result in merge_pull_request_results:
+            pull_request = result.validation.pull_request
+            user_id = pull_request.user_id.casefold()
+            results.append((
+                repository, pull_request.number, user_id, roster.name(pull_request.user_id),
+                pull_request.title, pull_request.head_sha, day, week, month, outcome(result),
+                result.merge.sha, result.merge.message
+            ))
+            if result.merge.merged:
+                merged_users.add(user_id)
+            for detail in result.validation.validation_details:
+                if not detail.result:
+                    failures.append((repository, pull_request.number, user_id, week, month, detail.validation, detail.reason))
+
+        with self._lock, self.connection:
+            user_counts, rule_counts = self.count_deltas(merge_pull_request_results, repository, periods)
+            run_id = self.connection.execute(
+                "INSERT INTO runs (repository, recorded_at, report_date, week, month) VALUES (?, ?, ?, ?, ?)",
+                (repository, datetime.now().isoformat(), day, week, month)
+            ).lastrowid
+            self.connection.executemany(
+                """
+                INSERT INTO pull_request_results (
+                    run_id, repository, number, user_id, name, title, head_sha,
+                    report_date, week, month, outcome, merge_sha, merge_message
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [(run_id, *row) for row in results]
+            )
+            self.connection.executemany(
+                "INSERT INTO rule_failures (run_id, repository, number, user_id, week, month, rule, reason) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, *row) for row in failures]
+            )
+            self.connection.executemany(
+                """
+                INSERT INTO user_stats (user_id, period, submitted, successful, rejected, failed, last_report_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, period) DO UPDATE SET
+                    submitted = submitted + excluded.submitted,
+                    successful = successful + excluded.successful,
+                    rejected = rejected + excluded.rejected,
+                    failed = failed + excluded.failed,
+                    last_report_date = MAX(last_report_date, excluded.last_report_date)
+                """,
+                [
+                    (user_id, period, counts["submitted"], counts["successful"], counts["rejected"], counts["failed"], day)
+                    for (user_id, period), counts in user_counts.items()
+                ]
+            )
+            self.connection.executemany(
+                """
+                INSERT INTO rule_stats (rule, period, failures) VALUES (?, ?, ?)
+                ON CONFLICT (rule, period) DO UPDATE SET failures = failures + excluded.failures
+                """,
+                [(rule, period, count) for (rule, period), count in rule_counts.items() if count]
+            )
+            # 연속 제출 일수는 merge된 PR이 있는 날만 센다
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO user_days (user_id, report_date) VALUES (?, ?)",
+                [(user_id, day) for user_id in merged_users]
+            )
+        log.info(f"Recorded run #{run_id}: {len(results)} pull requests, {len(failures)} rule failures")
+        return run_id
+
+    def count_deltas(
+        self,
+        merge_pull_request_results: List[MergePullRequestResult],
+        repository: str,
+        periods: Tuple[str, ...]
+    ) -> Tuple[Dict[Tuple[str, str], Dict[str, int]], Dict[Tuple[str, str], int]]:
+        """(사용자, 기간)별 / (규칙, 기간)별로 집계에 더할 값. 트랜잭션 안에서 부르고, counted_pull_requests를 갱신한다.
+        처음 세는 PR은 제출 1건과 결과를 더하고, 이미 센 PR은 이전 결과를 빼고 새 결과를 더한다.
+        """
+        user_counts: Dict[Tuple[str, str], Dict[str, int]] = {}
+        rule_counts: Dict[Tuple[str, str], int] = {}
+        for result in merge_pull_request_results:
+            pull_request = result.validation.pull_request
+            user_id = pull_request.user_id.casefold()
+            case = outcome(result)
+            rules = sorted({d.validation for d in result.validation.validation_details if not d.result})
+            for period in periods:
+                key = (repository, pull_request.number, pull_request.head_sha, period)
+                previous = self.connection.execute(
+                    "SELECT outcome, rules FROM counted_pull_requests WHERE repository = ? AND number = ? AND head_sha = ? AND period = ?",
+                    key
+                ).fetchone()
+                counts = user_counts.setdefault((user_id, period), dict.fromkeys(("submitted", *OUTCOMES), 0))
+                counts[case] += 1
+                if previous is None:
+                    counts["submitted"] += 1
+                    previous_rules = []
+                else:
+                    counts[previous["outcome"]] -= 1
+                    previous_rules = json.loads(previous["rules"])
+                for rule in rules:
+                    rule_counts[(rule, period)] = rule_counts.get((rule, period), 0) + 1
+                for rule in previous_rules:
+                    rule_counts[(rule, period)] = rule_counts.get((rule, period), 0) - 1
+                self.connection.execute(
+                    """
+                    INSERT INTO counted_pull_requests (repository, number, head_sha, period, user_id, outcome, rules)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (repository, number, head_sha, period) DO UPDATE SET
+                        outcome = excluded.outcome, rules = excluded.rules
+                    """,
+                    (*key, user_id, case, json.dumps(rules))
+                )
+        return user_counts, rule_counts
+
+    def user_stats(self, period: str) -> List[Dict]:
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT * FROM user_stats WHERE period = ? ORDER BY user_id", (period,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def rule_stats(self, period: str) -> List[Dict]:
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT rule, failures FROM rule_stats WHERE period = ? ORDER BY failures DESC, rule", (period,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def streak(self, user_id: str, until: datetime | None = None) -> int:
+        """until(기본값: 보고 날짜)까지 merge된 PR이 있었던 날이 연속으로 며칠인지"""
+        until = (until or DateUtil.get_report_date()).date()
+        with self._lock:
+            days = self.connection.execute(
+                "SELECT report_date FROM user_days WHERE user_id = ? AND report_date <= ? ORDER BY report_date DESC LIMIT 366",
+                (user_id.casefold(), until.isoformat())
+            ).fetchall()
+        streak = 0
+        for (day,) in days:
+            if day != (until - timedelta(days=streak)).isoformat():
+                break
+            streak += 1
+        return streak
+
+    def close(self):
+        self.connection.close()
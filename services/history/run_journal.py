@@ -0,0 +1,86 @@
+import os
+import json
+import logging
+import threading
+from dataclasses import asdict, is_dataclass
+from datetime import datetime
+from typing import Any, Dict, List
+
+from models import MergeResult
+log = logging.getLogger(__name__)
+
+def encode(o: Any) -> Any:
+    """json.dumps의 default. dataclass는 dataclasses.asdict, datetime은 isoformat으로 저장한다"""
+    if is_dataclass(o):
+        return asdict(o)
+    if isinstance(o, datetime):
+        return o.isoformat()
+    raise TypeError(f"{type(o).__name__} is not JSON serializable")
+
+class RunJournal:
+    """한 번의 실행에서 끝낸 단계를 JSON Lines 파일에 순서대로 기록하는 write-ahead journal.
+
+    fetch / validate 결과, PR마다 merge 시작(merge_start)과 결과(merge), 보고서 전송(report_sent)을 기록하고
+    한 줄을 쓸 때마다 fsync 하므로 중간에 프로세스가 죽어도 그 전까지 기록한 단계는 남는다.
+    resume=True로 열면 기존 기록을 읽어서 끝난 단계를 건너뛸 수 있고, 아니면 기록을 비우고 새로 시작한다.
+    """
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries: List[Dict] = self.load(path) if resume else []
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = open(path, "a" if resume else "w", encoding="utf-8")
+        if resume and self.entries:
+            log.info(f"Resuming from {path}: {', '.join(sorted({e['stage'] for e in self.entries}))}")
+
+    @staticmethod
+    def load(path: str) -> List[Dict]:
+        if not os.path.exists(path):
+            return []
+        entries = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # 쓰는 도중에 죽어서 잘린 마지막 줄
+                    log.warning(f"Ignoring a truncated journal entry in {path}")
+        return entries
+
+    def write(self, stage: str, **data):
+        line = json.dumps({"stage": stage, "at": datetime.now().isoformat(), **data}, ensure_ascii=False, default=encode)
+        with self._lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.entries.append(json.loads(line))
+
+    def last(self, stage: str) -> Dict | None:
+        return next((e for e in reversed(self.entries) if e["stage"] == stage), None)
+
+    def validated(self) -> Dict[int, Dict]:
+        """PullRequestPipeline이 micro-batch마다 기록한 검사 결과. PR 번호 -> PullRequestValidationResult.from_dict에 넘길 값"""
+        return {
+            result["pull_request"]["number"]: result
+            for e in self.entries
+            if e["stage"] == "validate_batch"
+            for result in e["results"]
+        }
+
+    def merged(self) -> Dict[int, MergeResult]:
+        """merge에 성공한 PR. resume 할 때 다시 merge하지 않는다"""
+        return {
+            e["number"]: MergeResult(**e["result"])
+            for e in self.entries
+            if e["stage"] == "merge" and e["result"]["merged"]
+        }
+
+    def in_doubt(self) -> List[int]:
+        """merge 요청을 보냈지만 결과를 기록하기 전에 멈춘 PR. 실제로 merge 되었는지 확인해야 한다"""
+        started = [e["number"] for e in self.entries if e["stage"] == "merge_start"]
+        finished = {e["number"] for e in self.entries if e["stage"] == "merge"}
+        return [number for number in dict.fromkeys(started) if number not in finished]
+
+    def close(self):
+        self.file.close()
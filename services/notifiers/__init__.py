@@ -1 +1,6 @@
-from .discord_bot import DiscordBot
\ No newline at end of file
+from utils.lazy_module import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "DiscordBot": ".discord_bot",
+    "DiscordRestNotifier": ".discord_rest_notifier",
+})
\ No newline at end of file
@@ -2,7 +2,7 @@
 import discord
 from typing import List
 from typing_extensions import Self
-import time
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -46,13 +46,13 @@ class DiscordBot(discord.Client):
                 f'{channel.name}(id: {channel.id})'
             )
             if type(self.messages) == str:
-                await channel.send(msg)
+                await channel.send(self.messages)
             else:
                 for msg in self.messages:
                     if type(msg) != str:
                         msg = str(msg)
                     await channel.send(msg)
-                    time.sleep(1)
+                    await asyncio.sleep(1)
         except Exception as ex:
             logger.warn(ex)
         finally:
@@ -0,0 +1,123 @@
+import time
+import asyncio
+import logging
+import aiohttp
+from typing import List, Dict
+from typing_extensions import Self
+from telemetry import MetricsRegistry, HTTP_REQUEST_SECONDS
+
+logger = logging.getLogger(__name__)
+
+class DiscordRestNotifier:
+    """Gateway 연결 없이 Discord REST API(또는 webhook url)로 메시지를 보내는 notifier.
+
+    DiscordBot과 같은 bot/set_channel_id/notify 메소드를 제공한다.
+    보낼 메시지는 2000자 제한 안에서 최대한 합쳐서 보내고, 고정된 sleep 대신
+    Discord의 rate limit 헤더(X-RateLimit-Remaining / X-RateLimit-Reset-After)와 429 응답을 따른다.
+    """
+    API_URL = "https://discord.com/api/v10"
+    MAX_MESSAGE_LENGTH = 2000
+    MAX_RETRIES = 5
+    
+    channel_id: int = None
+    token: str = None
+    webhook_url: str = None
+    
+    @classmethod
+    def bot(cls, token: str) -> Self:
+        return cls().set_token(token)
+    
+    @classmethod
+    def webhook(cls, webhook_url: str) -> Self:
+        notifier = cls()
+        notifier.webhook_url = webhook_url
+        return notifier
+    
+    def set_token(self, token: str) -> Self:
+        self.token = token
+        return self
+    
+    def set_channel_id(self, _id: int) -> Self:
+        self.channel_id = _id
+        return self
+    
+    def url(self) -> str:
+        if self.webhook_url:
+            return f"{self.webhook_url}?wait=true"
+        if type(self.channel_id) != int:
+            raise AttributeError("channel_id should be set as integer value. Use set_channel_id method")
+        return f"{self.API_URL}/channels/{self.channel_id}/messages"
+    
+    def headers(self) -> Dict[str, str]:
+        return {} if self.webhook_url else {"Authorization": f"Bot {self.token}"}
+    
+    @classmethod
+    def split_message(cls, message: str) -> List[str]:
+        """MAX_MESSAGE_LENGTH보다 긴 메시지를 줄 단위로 나눈다. 코드 블록(```)은 나눈 위치에서 닫고 다시 연다"""
+        if len(message) <= cls.MAX_MESSAGE_LENGTH:
+            return [message]
+        # 닫는 ``` 를 붙일 자리를 남겨둔다
+        limit = cls.MAX_MESSAGE_LENGTH - len("\n```")
+        piece_length = limit // 2
+        chunks: List[str] = []
+        lines: List[str] = []
+        length = 0
+        fence = None  # 열려있는 코드 블록의 시작 문자열 (ex. ```md)
+        for line in message.split("\n"):
+            for start in range(0, max(len(line), 1), piece_length):
+                piece = line[start:start + piece_length]
+                if lines and length + 1 + len(piece) > limit:
+                    text = "\n".join(lines)
+                    chunks.append(f"{text}\n```" if fence else text)
+                    lines = [fence] if fence else []
+                    length = len(fence) if fence else 0
+                length += len(piece) + (1 if lines else 0)
+                lines.append(piece)
+                if piece.count("```") % 2 == 1:
+                    fence = None if fence else "```" + piece.rsplit("```", 1)[-1].strip()
+        if lines:
+            chunks.append("\n".join(lines))
+        return chunks
+    
+    @classmethod
+    def pack(cls, messages: List[str]) -> List[str]:
+        """메시지들을 2000자 제한 안에서 가능한 적은 수의 메시지로 합친다"""
+        packed: List[str] = []
+        for message in messages:
+            for chunk in cls.split_message(str(message)):
+                if packed and len(packed[-1]) + 1 + len(chunk) <= cls.MAX_MESSAGE_LENGTH:
+                    packed[-1] = f"{packed[-1]}\n{chunk}"
+                else:
+                    packed.append(chunk)
+        return packed
+    
+    async def send(self, session: aiohttp.ClientSession, content: str):
+        for _ in range(self.MAX_RETRIES):
+            start = time.perf_counter()
+            async with session.post(self.url(), json={"content": content}, headers=self.headers()) as res:
+                MetricsRegistry.shared().observe(
+                    HTTP_REQUEST_SECONDS, time.perf_counter() - start,
+                    method="POST", lane="discord", status=res.status
+                )
+                if res.status == 429:
+                    body = await res.json(content_type=None)
+                    retry_after = float(body.get("retry_after", res.headers.get("Retry-After", 1)))
+                    logger.warning(f"Discord rate limited. Retrying after {retry_after}s")
+                    await asyncio.sleep(retry_after)
+                    continue
+                res.raise_for_status()
+                # bucket이 비었으면 초기화될 때까지 기다린다
+                if res.headers.get("X-RateLimit-Remaining") == "0":
+                    await asyncio.sleep(float(res.headers.get("X-RateLimit-Reset-After", 0)))
+                return
+        raise RuntimeError("Discord rate limit retries exceeded")
+    
+    async def notify_async(self, messages: List[str] | str):
+        if type(messages) == str:
+            messages = [messages]
+        async with aiohttp.ClientSession() as session:
+            for content in self.pack(messages):
+                await self.send(session, content)
+    
+    def notify(self, messages: List[str] | str):
+        asyncio.run(self.notify_async(messages))
@@ -1,4 +1,11 @@
-from .pull_request_fetcher import PullRequestFetcher
-from .pull_request_parser import PullRequestParser
-from .pull_request_validator import PullRequestValidator
-from .pull_request_merger import PullRequestMerger
\ No newline at end of file
+from utils.lazy_module import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "PullRequestFetcher": ".pull_request_fetcher",
+    "PullRequestGraphQLFetcher": ".pull_request_graphql_fetcher",
+    "PullRequestParser": ".pull_request_parser",
+    "PullRequestValidator": ".pull_request_validator",
+    "PullRequestMerger": ".pull_request_merger",
+    "PullRequestGitMerger": ".pull_request_git_merger",
+    "PullRequestPipeline": ".pull_request_pipeline",
+})
\ No newline at end of file
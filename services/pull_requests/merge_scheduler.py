@@ -0,0 +1,47 @@
+from typing import List, Dict, Set
+from models import PullRequest, PullRequestValidationResult
+
+class MergeScheduler:
+    """PullRequest.files가 겹치는지를 기준으로 merge 순서를 정한다.
+
+    파일이 겹치지 않는 PR끼리는 같은 batch에서 동시에 merge하고,
+    같은 경로를 건드리는 PR은 PR 번호 순서대로 서로 다른 batch에 배치해서 순차적으로 merge한다.
+    """
+    @staticmethod
+    def build_conflict_graph(items: List[PullRequestValidationResult]) -> Dict[int, Set[int]]:
+        """PR 번호 -> 파일이 겹치는 PR 번호들"""
+        graph: Dict[int, Set[int]] = {item.pull_request.number: set() for item in items}
+        owners: Dict[str, List[int]] = {}
+        for item in items:
+            for path in item.pull_request.files:
+                owners.setdefault(path, []).append(item.pull_request.number)
+        for numbers in owners.values():
+            for number in numbers:
+                graph[number].update(n for n in numbers if n != number)
+        return graph
+
+    @staticmethod
+    def add_conflicts(owners: Dict[str, List[int]], pull_request: PullRequest) -> Set[int]:
+        """owners(경로 -> PR 번호들)에 pull_request를 추가하고, 먼저 추가된 PR 중 파일이 겹치는 PR 번호들을 반환.
+        번호 순서로 추가하면 반환값은 plan과 같은 순서로 merge 하기 위해 먼저 끝나야 하는 PR들이다
+        """
+        paths = set(pull_request.files)
+        earlier = {number for path in paths for number in owners.get(path, ())}
+        for path in paths:
+            owners.setdefault(path, []).append(pull_request.number)
+        return earlier
+
+    @staticmethod
+    def plan(items: List[PullRequestValidationResult]) -> List[List[PullRequestValidationResult]]:
+        graph = MergeScheduler.build_conflict_graph(items)
+        batches: List[List[PullRequestValidationResult]] = []
+        levels: Dict[int, int] = {}
+        # 번호가 작은 PR부터, 파일이 겹치는 앞 번호 PR들보다 뒤의 batch에 넣는다
+        for item in sorted(items, key=lambda i: i.pull_request.number):
+            number = item.pull_request.number
+            level = max((levels[n] + 1 for n in graph[number] if n in levels), default=0)
+            levels[number] = level
+            if level == len(batches):
+                batches.append([])
+            batches[level].append(item)
+        return batches
@@ -1,35 +1,77 @@
 
-from typing import List, Dict
+import asyncio
+import aiohttp
+from typing import List, Dict, Iterator, Tuple
+from typing_extensions import Self
 from models import BaseRequest
 from configs import settings
+from .pull_request_parser import PullRequestParser
 
 class PullRequestFetcher(BaseRequest):
     headers: dict = settings.github.SERVICE_HEADERS
-    sleeptime: float = settings.request.DEFAULT_SLEEPTIME
     pull_requests: List[Dict] | None = None
     pull_request_files: Dict = {}
+    async_fetch: bool = False
+    concurrency: int = 8
+
+    def set_async_fetch(self, async_fetch: bool, concurrency: int | None = None) -> Self:
+        self.async_fetch = async_fetch
+        if concurrency is not None:
+            self.concurrency = concurrency
+        return self
     
     def fetch_pull_requests(self):
         # Open되어있는 Pull request 전부 가져오기
-        self.pull_requests = self.request(
-            method='get', 
-            url=settings.github.url_pull_requests()
-        )
+        self.pull_requests = list(self.iter_pull_requests())
         
     def fetch_pull_request_files(self):
         for p in self.pull_requests:
             pull_number = p.get("number")
-            self.pull_request_files[pull_number] = self.request(
-                method='get', 
-                url=settings.github.url_pull_request_files(pull_number)
-            )
+            self.pull_request_files[pull_number] = list(self.iter_pull_request_files(pull_number))
+            
+    def iter_pull_requests(self) -> Iterator[Dict]:
+        # 페이지가 도착하는 대로 Pull request를 하나씩 반환
+        return self.paginate(url=self.github().url_pull_requests(), fields=PullRequestParser.pull_request_fields)
+
+    def iter_pull_request_files(self, pull_number: int) -> Iterator[Dict]:
+        # 파일 목록 응답의 patch(diff)는 검사에 쓰지 않으므로 디코딩하면서 버린다
+        return self.paginate(url=self.github().url_pull_request_files(pull_number), fields=PullRequestParser.file_fields)
+
+    def stream(self) -> Iterator[Tuple[Dict, List[Dict]]]:
+        """(pull request, 파일 목록) 쌍을 하나씩 반환. 전체 목록을 메모리에 들고 있지 않는다."""
+        for p in self.iter_pull_requests():
+            yield p, list(self.iter_pull_request_files(p.get("number")))
             
+    async def fetch_pull_request_files_async(self):
+        # 동시에 최대 concurrency 개의 요청만 보낸다
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def fetch(session: aiohttp.ClientSession, pull_number: int):
+            async with semaphore:
+                self.pull_request_files[pull_number] = [
+                    f async for f in self.paginate_async(
+                        session=session,
+                        url=self.github().url_pull_request_files(pull_number),
+                        fields=PullRequestParser.file_fields
+                    )
+                ]
+
+        connector = aiohttp.TCPConnector(limit=max(1, self.concurrency))
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await asyncio.gather(*(
+                fetch(session, p.get("number"))
+                for p in self.pull_requests
+            ))
+
     def fetch_all(self):
         self.fetch_pull_requests()
-        self.fetch_pull_request_files()
+        if self.async_fetch:
+            asyncio.run(self.fetch_pull_request_files_async())
+        else:
+            self.fetch_pull_request_files()
         
     def get_pull_requests(self) -> List[Dict]:
         return self.pull_requests
     
     def get_pull_request_files(self) -> Dict:
-        return self.pull_request_files
\ No newline at end of file
+        return self.pull_request_files
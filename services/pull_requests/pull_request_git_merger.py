@@ -0,0 +1,219 @@
+import os
+import base64
+import logging
+import subprocess
+from typing import ClassVar, List, Dict, Tuple
+from typing_extensions import Self
+from urllib.parse import urlsplit
+from models import PullRequestValidationResult, MergeResult, MergePullRequestResult
+from .pull_request_merger import PullRequestMerger
+from .pull_request_graphql_fetcher import graphql_target
+log = logging.getLogger(__name__)
+
+MERGED_MESSAGE = "Pull Request successfully merged"
+
+class GitError(Exception):
+    """git 명령이 실패했을 때 발생"""
+    def __init__(self, args: List[str], returncode: int, stderr: str):
+        self.returncode = returncode
+        self.stderr = stderr
+        super().__init__(f"git {' '.join(args[:2])} failed ({returncode}): {stderr.strip()}")
+
+def clone_url(url_pull_requests: str) -> str:
+    """`{api}/repos/{owner}/{name}/pulls` 에서 clone 주소를 구한다.
+    api.github.com은 github.com, Github Enterprise의 `{host}/api/v3` 는 `{host}` 가 된다.
+    """
+    scheme, netloc, _, _, _ = urlsplit(url_pull_requests)
+    _, owner, name = graphql_target(url_pull_requests)
+    if netloc == "api.github.com":
+        netloc = "github.com"
+    return f"{scheme}://{netloc}/{owner}/{name}.git"
+
+class PullRequestGitMerger(PullRequestMerger):
+    """PR마다 merge API를 호출하는 대신 로컬 bare mirror에서 merge하고 한 번에 push한다.
+
+    검사를 통과한 PR의 refs/pull/N/head를 한 번의 git fetch로 가져와서 PR 번호 순서대로
+    `git merge-tree --write-tree`(git 2.38 이상)로 merge한다. 충돌이 나는 PR은 건너뛰고 merged=False로 기록한다.
+    octopus가 True면 merge 커밋을 PR마다 만들지 않고 충돌이 없는 PR 전체를 부모로 하는 커밋 하나를 만든다.
+    push는 마지막에 한 번만 하고, 그 사이에 branch가 바뀌어서 거절되면 merge_retries번까지 다시 fetch해서 merge한다.
+    PR의 head 커밋이 base branch에 포함되면 Github이 PR을 merged로 표시한다.
+
+    remote에 로컬 bare 저장소 경로를 지정하면 네트워크 없이 사용할 수 있다.
+    """
+    mirror_path: str
+    # None이면 self.github().url_pull_requests()에서 clone 주소를 구한다
+    remote: str | None = None
+    branch: str = "main"
+    octopus: bool = False
+    author_name: str = "gwichanhub"
+    author_email: str = "gwichanhub@users.noreply.github.com"
+    # 한 번에 push하므로 PR 하나씩 merge하지 않는다
+    streams: ClassVar[bool] = False
+
+    def set_remote(self, remote: str | None) -> Self:
+        self.remote = remote
+        return self
+
+    def set_branch(self, branch: str) -> Self:
+        self.branch = branch
+        return self
+
+    def set_octopus(self, octopus: bool) -> Self:
+        self.octopus = octopus
+        return self
+
+    def remote_url(self) -> str:
+        return self.remote or clone_url(self.github().url_pull_requests())
+
+    def auth_config(self) -> List[str]:
+        """https remote에 보낼 인증 헤더. 토큰이 mirror의 config에 남지 않도록 명령마다 -c로 넘긴다"""
+        if not self.remote_url().startswith("https://"):
+            return []
+        _, headers = self.route("put", self.remote_url())
+        token = headers.get("Authorization", "").split()[-1:]
+        if not token:
+            return []
+        basic = base64.b64encode(f"x-access-token:{token[0]}".encode()).decode()
+        return ["-c", f"http.extraHeader=Authorization: Basic {basic}"]
+
+    def git(self, *args: str, check: bool = True) -> subprocess.CompletedProcess:
+        env = {
+            **os.environ,
+            "GIT_TERMINAL_PROMPT": "0",
+            "GIT_AUTHOR_NAME": self.author_name,
+            "GIT_AUTHOR_EMAIL": self.author_email,
+            "GIT_COMMITTER_NAME": self.author_name,
+            "GIT_COMMITTER_EMAIL": self.author_email,
+        }
+        process = subprocess.run(["git", "-C", self.mirror_path, *args], capture_output=True, text=True, env=env)
+        if check and process.returncode != 0:
+            raise GitError(list(args), process.returncode, process.stderr)
+        return process
+
+    def ensure_mirror(self):
+        if not os.path.exists(os.path.join(self.mirror_path, "HEAD")):
+            os.makedirs(self.mirror_path, exist_ok=True)
+            self.git("init", "--bare", "--quiet")
+
+    def fetch(self, numbers: List[int]):
+        """base branch와 PR들의 head를 한 번의 fetch로 가져온다"""
+        refspecs = [f"+refs/heads/{self.branch}:refs/heads/{self.branch}"]
+        refspecs += [f"+refs/pull/{n}/head:refs/pull/{n}/head" for n in numbers]
+        self.git(*self.auth_config(), "fetch", "--quiet", "--no-tags", self.remote_url(), *refspecs)
+
+    def merge_tree(self, base: str, head: str) -> Tuple[str | None, List[str]]:
+        """(merge 결과 tree, 충돌난 파일 목록). 충돌이 나면 tree는 None"""
+        process = self.git("merge-tree", "--write-tree", "--name-only", "--no-messages", base, head, check=False)
+        lines = process.stdout.splitlines()
+        if process.returncode == 0:
+            return lines[0], []
+        if process.returncode == 1:
+            return None, [line for line in lines[1:] if line]
+        raise GitError(["merge-tree", base, head], process.returncode, process.stderr)
+
+    def is_ancestor(self, commit: str, of: str) -> bool:
+        return self.git("merge-base", "--is-ancestor", commit, of, check=False).returncode == 0
+
+    def commit_tree(self, tree: str, parents: List[str], message: str) -> str:
+        parent_args = [arg for parent in parents for arg in ("-p", parent)]
+        return self.git("commit-tree", tree, *parent_args, "-m", message).stdout.strip()
+
+    @staticmethod
+    def commit_message(item: PullRequestValidationResult) -> str:
+        pull_request = item.pull_request
+        return f"Merge pull request #{pull_request.number} from {pull_request.user_id}\n\n{pull_request.title}"
+
+    def merge_locally(self, items: List[PullRequestValidationResult]) -> Tuple[str, str, Dict[int, MergeResult]]:
+        """(기존 base, merge한 뒤의 base, PR 번호별 결과)"""
+        base = self.git("rev-parse", f"refs/heads/{self.branch}").stdout.strip()
+        current, tree = base, None
+        heads: List[str] = []
+        merged: List[PullRequestValidationResult] = []
+        results: Dict[int, MergeResult] = {}
+        for item in sorted(items, key=lambda i: i.pull_request.number):
+            number = item.pull_request.number
+            head = self.git("rev-parse", f"refs/pull/{number}/head").stdout.strip()
+            if item.pull_request.head_sha and item.pull_request.head_sha != head:
+                # 검사한 뒤에 새 커밋이 push된 PR은 검사하지 않은 커밋이므로 merge하지 않는다
+                results[number] = MergeResult(message="Head branch was modified. Review and try the merge again.")
+                continue
+            if self.is_ancestor(head, base):
+                # 이전 실행에서 push까지 끝난 PR
+                results[number] = MergeResult(sha=base, merged=True, message=MERGED_MESSAGE)
+                continue
+            next_tree, conflicts = self.merge_tree(current, head)
+            if next_tree is None:
+                results[number] = MergeResult(message=f"Merge conflict ({', '.join(conflicts)})")
+                continue
+            # octopus여도 다음 PR의 merge-tree에 넘길 커밋이 필요하므로 만들어두고, push하는 커밋은 마지막에 하나만 만든다
+            current, tree = self.commit_tree(next_tree, [current, head], self.commit_message(item)), next_tree
+            if not self.octopus:
+                results[number] = MergeResult(sha=current, merged=True, message=MERGED_MESSAGE)
+            heads.append(head)
+            merged.append(item)
+
+        if self.octopus and merged:
+            message = f"Merge {len(merged)} pull requests\n\n" + "\n".join(self.commit_message(i).splitlines()[0] for i in merged)
+            current = self.commit_tree(tree, [base, *heads], message)
+            for item in merged:
+                results[item.pull_request.number] = MergeResult(sha=current, merged=True, message=MERGED_MESSAGE)
+        return base, current, results
+
+    def push(self, base: str, head: str):
+        # 다른 곳에서 branch를 바꿨으면 덮어쓰지 않고 거절되도록 한다
+        self.git(
+            *self.auth_config(), "push", "--quiet", f"--force-with-lease=refs/heads/{self.branch}:{base}",
+            self.remote_url(), f"{head}:refs/heads/{self.branch}"
+        )
+
+    def merge_all(self, items: List[PullRequestValidationResult]) -> Dict[int, MergeResult]:
+        if not items:
+            return {}
+        self.ensure_mirror()
+        numbers = [item.pull_request.number for item in items]
+        for attempt in range(self.merge_retries + 1):
+            self.fetch(numbers)
+            base, head, results = self.merge_locally(items)
+            if head == base:
+                return results
+            try:
+                self.push(base, head)
+                log.info(f"Pushed {sum(r.merged for r in results.values())} pull requests to {self.branch} ({head[:7]})")
+                return results
+            except GitError as ex:
+                if attempt == self.merge_retries:
+                    raise
+                log.info(f"Push to {self.branch} was rejected. Retrying... ({ex})")
+        return {}
+
+    def merge(self, validation_results: List[PullRequestValidationResult]):
+        if self.skip_merge:
+            return super().merge(validation_results)
+
+        merge_results = self.journal.merged() if self.journal else {}
+        approved = [
+            item for item in validation_results
+            if item.validation_result and item.pull_request.number not in merge_results
+        ]
+        # push가 끝났는지 모르는 채로 멈춘 PR은 다음 실행에서 is_ancestor로 확인한다
+        if self.journal:
+            for item in approved:
+                self.journal.write("merge_start", number=item.pull_request.number)
+        try:
+            pushed = self.merge_all(approved)
+        except GitError as ex:
+            log.warning(ex)
+            message = f"요청에 실패했습니다. ({ex.__class__.__name__})"
+            pushed = {item.pull_request.number: MergeResult(message=message) for item in approved}
+        if self.journal:
+            for number, merge_result in pushed.items():
+                self.journal.write("merge", number=number, result=merge_result)
+        merge_results.update(pushed)
+
+        for item in validation_results:
+            self.results.append(
+                MergePullRequestResult(
+                    merge=merge_results.get(item.pull_request.number, MergeResult()),
+                    validation=item
+                )
+            )
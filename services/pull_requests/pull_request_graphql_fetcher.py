@@ -0,0 +1,183 @@
+
+import time
+import logging
+from typing import List, Dict, Iterator, Tuple
+from typing_extensions import Self
+from urllib.parse import urlsplit, urlunsplit
+from models import BaseRequest
+from configs import settings
+log = logging.getLogger(__name__)
+
+# 한 번의 쿼리로 PR 목록과 파서가 읽는 필드만 가져온다. 파일이 files_per_page개를 넘는 PR만 따로 이어서 가져온다
+PULL_REQUESTS_QUERY = """
+query($owner: String!, $name: String!, $cursor: String, $first: Int!, $files: Int!) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(states: OPEN, first: $first, after: $cursor, orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number
+        title
+        createdAt
+        headRefOid
+        author { login }
+        labels(first: 100) { nodes { name } }
+        files(first: $files) {
+          pageInfo { hasNextPage endCursor }
+          nodes { path changeType }
+        }
+      }
+    }
+  }
+}
+"""
+
+PULL_REQUEST_FILES_QUERY = """
+query($owner: String!, $name: String!, $number: Int!, $cursor: String, $files: Int!) {
+  repository(owner: $owner, name: $name) {
+    pullRequest(number: $number) {
+      files(first: $files, after: $cursor) {
+        pageInfo { hasNextPage endCursor }
+        nodes { path changeType }
+      }
+    }
+  }
+}
+"""
+
+# rate limit에 걸린 쿼리는 HTTP 200에 이 type의 error로 온다
+RATE_LIMITED = "RATE_LIMITED"
+
+# 탈퇴한 사용자의 PR은 author가 null로 온다. REST API와 같은 이름을 사용한다
+GHOST_LOGIN = "ghost"
+
+class GraphQLError(Exception):
+    """GraphQL 응답에 errors가 포함되어 있을 때 발생"""
+    def __init__(self, errors: List[Dict]):
+        self.errors = errors
+        super().__init__("; ".join(e.get("message", str(e)) for e in errors))
+
+def graphql_target(url_pull_requests: str) -> Tuple[str, str, str]:
+    """`{api}/repos/{owner}/{name}/pulls` 에서 (GraphQL endpoint, owner, name)을 구한다.
+    Github Enterprise의 `{host}/api/v3` 는 `{host}/api/graphql` 로 바뀐다.
+    """
+    scheme, netloc, path, _, _ = urlsplit(url_pull_requests)
+    prefix, _, repository = path.partition("/repos/")
+    owner, name = repository.split("/")[:2]
+    if prefix.endswith("/v3"):
+        prefix = prefix[:-len("/v3")]
+    return urlunsplit((scheme, netloc, f"{prefix}/graphql", "", "")), owner, name
+
+def to_rest_pull_request(node: Dict) -> Dict:
+    """PullRequestParser가 그대로 읽을 수 있도록 REST API와 같은 모양으로 바꾼다"""
+    return {
+        "number": node["number"],
+        "title": node["title"],
+        "user": {"login": (node.get("author") or {}).get("login", GHOST_LOGIN)},
+        "created_at": node["createdAt"],
+        "labels": [{"name": l["name"]} for l in node["labels"]["nodes"]],
+        "head": {"sha": node.get("headRefOid") or ""}
+    }
+
+def to_rest_file(node: Dict) -> Dict:
+    # REST API의 status는 added/removed/modified/renamed/..., GraphQL의 changeType은 ADDED/DELETED/MODIFIED/RENAMED/...
+    change_type = node["changeType"].lower()
+    return {
+        "filename": node["path"],
+        "status": "removed" if change_type == "deleted" else change_type
+    }
+
+class PullRequestGraphQLFetcher(BaseRequest):
+    """PullRequestFetcher와 같은 결과를 GraphQL API로 가져온다.
+
+    REST API는 PR 목록 1번 + PR마다 파일 목록 1번씩 요청하지만, 여기서는 pull_requests_per_page개의 PR과
+    각 PR의 파일 목록을 쿼리 한 번으로 가져온다.
+    """
+    headers: dict = settings.github.SERVICE_HEADERS
+    pull_requests: List[Dict] | None = None
+    pull_request_files: Dict = {}
+    # None이면 self.github().url_pull_requests()에서 구한다. 로컬 테스트 서버를 사용할 때 지정한다
+    endpoint: str | None = None
+    pull_requests_per_page: int = 50
+    files_per_page: int = 100
+
+    def set_endpoint(self, endpoint: str | None) -> Self:
+        self.endpoint = endpoint
+        return self
+
+    def target(self) -> Tuple[str, str, str]:
+        endpoint, owner, name = graphql_target(self.github().url_pull_requests())
+        return self.endpoint or endpoint, owner, name
+
+    def query(self, query: str, variables: Dict) -> Dict:
+        """조회만 하는 쿼리이므로 POST지만 GET과 같이 5xx와 연결 오류에 재시도한다.
+        RATE_LIMITED error는 실행되지 않은 쿼리이므로 기다렸다가 다시 보낸다. 대기 시각은 응답의 rate limit 헤더를 본 limiter가 정한다.
+        """
+        endpoint, owner, name = self.target()
+        max_retries = self.transport.max_retries
+        attempt = 0
+        while True:
+            body = self.request('post', endpoint, retries=max_retries, json={
+                "query": query,
+                "variables": {"owner": owner, "name": name, **variables}
+            })
+            errors = body.get("errors")
+            if not errors:
+                return body["data"]["repository"]
+            if attempt >= max_retries or any(e.get("type") != RATE_LIMITED for e in errors):
+                raise GraphQLError(errors)
+            log.warning(f"GraphQL query was rate limited, retrying ({errors[0].get('message', '')})")
+            time.sleep(self.transport.retry_delay(attempt))
+            attempt += 1
+
+    def iter_pages(self) -> Iterator[Dict]:
+        cursor = None
+        while True:
+            page = self.query(PULL_REQUESTS_QUERY, {
+                "cursor": cursor,
+                "first": self.pull_requests_per_page,
+                "files": self.files_per_page
+            })["pullRequests"]
+            yield from page["nodes"]
+            if not page["pageInfo"]["hasNextPage"]:
+                return
+            cursor = page["pageInfo"]["endCursor"]
+
+    def iter_file_nodes(self, pull_number: int, cursor: str | None = None) -> Iterator[Dict]:
+        while True:
+            files = self.query(PULL_REQUEST_FILES_QUERY, {
+                "number": pull_number,
+                "cursor": cursor,
+                "files": self.files_per_page
+            })["pullRequest"]["files"]
+            yield from files["nodes"]
+            if not files["pageInfo"]["hasNextPage"]:
+                return
+            cursor = files["pageInfo"]["endCursor"]
+
+    def stream(self) -> Iterator[Tuple[Dict, List[Dict]]]:
+        """(pull request, 파일 목록) 쌍을 하나씩 반환. PullRequestFetcher.stream과 같은 모양이다."""
+        for node in self.iter_pages():
+            files = node["files"]
+            file_nodes = files["nodes"]
+            if files["pageInfo"]["hasNextPage"]:
+                log.info(f"Pull request #{node['number']} has more than {self.files_per_page} files, fetching the rest")
+                file_nodes = file_nodes + list(self.iter_file_nodes(node["number"], files["pageInfo"]["endCursor"]))
+            yield to_rest_pull_request(node), [to_rest_file(f) for f in file_nodes]
+
+    def iter_pull_requests(self) -> Iterator[Dict]:
+        return (p for p, _ in self.stream())
+
+    def iter_pull_request_files(self, pull_number: int) -> Iterator[Dict]:
+        return (to_rest_file(f) for f in self.iter_file_nodes(pull_number))
+
+    def fetch_all(self):
+        self.pull_requests = []
+        for p, files in self.stream():
+            self.pull_requests.append(p)
+            self.pull_request_files[p["number"]] = files
+
+    def get_pull_requests(self) -> List[Dict]:
+        return self.pull_requests
+
+    def get_pull_request_files(self) -> Dict:
+        return self.pull_request_files
@@ -1,41 +1,135 @@
 
-from typing import List
+import time
+import random
+import logging
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import ClassVar, List, Dict
 from configs import settings
-from models import BaseRequest, PullRequestValidationResult, MergeResult, MergePullRequestResult
+from typing_extensions import Self
+from network import HttpStatusError
+from models import BaseRequest, PullRequestValidationResult, MergeResult, MergePullRequestResult, MergeResponsePayload
+from ..history.run_journal import RunJournal
+from .merge_scheduler import MergeScheduler
+log = logging.getLogger(__name__)
 
 class PullRequestMerger(BaseRequest):
     headers: dict = settings.github.SERVICE_HEADERS
-    sleeptime: float = settings.request.MERGE_SLEEPTIME
+    lane: str = "merge"
     results: List[MergePullRequestResult] = []
     skip_merge: bool = False
+    max_workers: int = 4
+    # "Base branch was modified" 응답을 받았을 때 다시 시도하는 횟수
+    merge_retries: int = 3
+    # 지정하면 PR마다 merge 시작과 결과를 기록하고, 이미 merge에 성공한 PR은 다시 요청하지 않는다
+    journal: RunJournal | None = None
+    # PullRequestPipeline에서 검사가 끝난 PR부터 하나씩 merge 할 수 있는지. False면 모두 검사한 뒤에 merge()를 한 번 부른다
+    streams: ClassVar[bool] = True
     
     def set_skip_merge(self, skip_merge: bool):
         self.skip_merge = skip_merge
     
+    def set_journal(self, journal: RunJournal | None) -> Self:
+        self.journal = journal
+        return self
+    
+    def set_max_workers(self, max_workers: int) -> Self:
+        self.max_workers = max_workers
+        return self
+    
     def merge(self, validation_results: List[PullRequestValidationResult]):
-        for item in validation_results:
-            if self.skip_merge:
-                self.results.append(
-                    MergePullRequestResult(
-                        merge=MergeResult.test_merge_result(item.validation_result),
-                        validation=item
-                    )
-                )
-                continue
-            res = {}
-            if item.validation_result:
-                res = self.request(
-                    method='put', 
-                    url=settings.github.url_merge_pull_request(pull_number=item.pull_request.number)
+        if self.skip_merge:
+            self.results.extend(
+                MergePullRequestResult(
+                    merge=MergeResult.test_merge_result(item.validation_result),
+                    validation=item
                 )
-            merge_result = MergeResult(
-                **res
+                for item in validation_results
             )
+            return
+        
+        merge_results: Dict[int, MergeResult] = self.journaled_merge_results()
+        batches = MergeScheduler.plan([
+            item for item in validation_results
+            if item.validation_result and item.pull_request.number not in merge_results
+        ])
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+            for batch in batches:
+                numbers = [item.pull_request.number for item in batch]
+                merge_results.update(zip(numbers, executor.map(self.merge_journaled, numbers)))
+        
+        for item in validation_results:
             self.results.append(
                 MergePullRequestResult(
-                    merge=merge_result,
+                    merge=merge_results.get(item.pull_request.number, MergeResult()),
                     validation=item
                 )
             )
+    
+    def merge_one(self, item: PullRequestValidationResult) -> MergePullRequestResult:
+        self.merge([item])
+        return self.results.pop()
+    
+    def journaled_merge_results(self) -> Dict[int, MergeResult]:
+        """journal에 merge 성공으로 기록된 PR과, 요청 중에 멈췄지만 실제로는 merge 된 PR의 결과"""
+        if self.journal is None:
+            return {}
+        merge_results = self.journal.merged()
+        for pull_number in self.journal.in_doubt():
+            if self.is_merged(pull_number):
+                log.info(f"Pull request #{pull_number} was merged before the previous run stopped")
+                merge_results[pull_number] = MergeResult(merged=True, message="Pull Request successfully merged")
+                self.journal.write("merge", number=pull_number, result=merge_results[pull_number])
+        return merge_results
+    
+    def merge_journaled(self, pull_number: int) -> MergeResult:
+        if self.journal is None:
+            return self.merge_pull_request(pull_number)
+        self.journal.write("merge_start", number=pull_number)
+        merge_result = self.merge_pull_request(pull_number)
+        self.journal.write("merge", number=pull_number, result=merge_result)
+        return merge_result
+    
+    def is_merged(self, pull_number: int) -> bool:
+        """GET /pulls/{pull_number}/merge 는 merge 되었으면 204, 아니면 404를 반환한다"""
+        try:
+            self.send('get', self.github().url_merge_pull_request(pull_number=pull_number))
+            return True
+        except HttpStatusError as ex:
+            if ex.status == 404:
+                return False
+            raise
+    
+    def merge_pull_request(self, pull_number: int) -> MergeResult:
+        merge_result = self.merge_response(pull_number)
+        for attempt in range(self.merge_retries):
+            if merge_result.merged or not self.is_base_branch_modified(merge_result):
+                break
+            log.info(f"Base branch was modified while merging #{pull_number}. Retrying...")
+            time.sleep(random.uniform(0, 2 ** attempt))
+            merge_result = self.merge_response(pull_number)
+        return merge_result
+    
+    def merge_response(self, pull_number: int) -> MergeResult:
+        return MergeResponsePayload.parse_obj(self.request_merge(pull_number)).to_merge_result()
+    
+    @staticmethod
+    def is_base_branch_modified(merge_result: MergeResult) -> bool:
+        return "base branch was modified" in merge_result.message.lower()
+    
+    def request_merge(self, pull_number: int) -> Dict:
+        try:
+            return self.request(
+                method='put', 
+                url=self.github().url_merge_pull_request(pull_number=pull_number)
+            )
+        except HttpStatusError as ex:
+            # 405: merge conflict 등으로 merge 할 수 없는 경우
+            log.warning(ex)
+            return {"merged": False, "message": ex.message}
+        except requests.exceptions.RequestException as ex:
+            log.warning(ex)
+            return {"merged": False, "message": f"요청에 실패했습니다. ({ex.__class__.__name__})"}
+        
     def get_merge_result(self) -> List[MergePullRequestResult]:
         return self.results
@@ -1,11 +1,12 @@
-from typing import List, Dict
+from typing import ClassVar, List, Dict, Iterable, Iterator, Tuple
 from pydantic import BaseModel
-from models import PullRequest
-from datetime import datetime
-import pytz
+from models import PullRequest, PullRequestPayload, PullRequestFilePayload, Fields, fields_of
 
 class PullRequestParser(BaseModel):
     parsed_pull_requests: List[PullRequest] = []
+    # parse_pull_request가 읽는 field. PullRequestFetcher는 응답을 디코딩하면서 이 field만 남긴다
+    pull_request_fields: ClassVar[Fields] = fields_of(PullRequestPayload)
+    file_fields: ClassVar[Fields] = fields_of(PullRequestFilePayload)
     
     def parse(
         self, 
@@ -14,26 +15,27 @@ class PullRequestParser(BaseModel):
     ):
         try:
             for p in pull_requests:
-                number = p.get('number')
-                title = p.get('title')
-                user_id = p.get('user').get('login')
-                
-                utc_datetime = datetime.strptime(p.get('created_at'), '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=pytz.UTC)
-                created_at = utc_datetime.astimezone(pytz.timezone('Asia/Seoul'))
-                
-                labels = [l.get("name") for l in p.get('labels')]
-                files = [f['filename'] for f in pull_request_files.get(number) if f['status'] != "removed"]
-                
                 self.parsed_pull_requests.append(
-                    PullRequest(
-                        number=int(number),
-                        title=title,
-                        user_id=user_id,
-                        created_at=created_at,
-                        labels=labels,
-                        files=files
-                    )
+                    self.parse_pull_request(p, pull_request_files.get(p.get('number')))
                 )
                 
         except KeyError as ex:
-            raise KeyError from ex
\ No newline at end of file
+            raise KeyError from ex
+
+    def parse_stream(self, items: Iterable[Tuple[Dict, List[Dict]]]) -> Iterator[PullRequest]:
+        """PullRequestFetcher.stream의 결과를 받는 대로 파싱해서 반환"""
+        try:
+            for p, files in items:
+                pull_request = self.parse_pull_request(p, files)
+                self.parsed_pull_requests.append(pull_request)
+                yield pull_request
+
+        except KeyError as ex:
+            raise KeyError from ex
+
+    @staticmethod
+    def parse_pull_request(p: Dict, pull_request_files: List[Dict]) -> PullRequest:
+        # Github 응답은 여기서 한 번만 pydantic으로 검증하고, 이후에는 가벼운 PullRequest만 사용한다
+        return PullRequestPayload.parse_obj(p).to_pull_request(
+            files=[PullRequestFilePayload.parse_obj(f) for f in pull_request_files]
+        )
@@ -0,0 +1,296 @@
+import math
+import queue
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Set, Tuple
+
+from models import PullRequest, PullRequestValidationResult, MergeResult, MergePullRequestResult
+from ..history.run_journal import RunJournal
+from .pull_request_fetcher import PullRequestFetcher
+from .pull_request_graphql_fetcher import PullRequestGraphQLFetcher
+from .pull_request_parser import PullRequestParser
+from .pull_request_validator import PullRequestValidator
+from .pull_request_merger import PullRequestMerger
+from .merge_scheduler import MergeScheduler
+log = logging.getLogger(__name__)
+
+# 앞 단계가 끝났다는 표시
+DONE = object()
+
+class PipelineStopped(Exception):
+    """다른 단계에서 예외가 나서 pipeline을 멈출 때 각 단계의 thread 안에서만 사용한다"""
+
+class PullRequestPipeline:
+    """PR 하나씩 파일 목록 fetch → 파싱 → 검사 → merge를 차례로 흘려보낸다.
+
+    모든 PR의 파일 목록을 받은 뒤에 검사를 시작하지 않고, 파일 목록을 받은 PR부터 바로 검사하고
+    검사를 통과한 PR은 바로 merge 한다. 단계 사이에는 크기가 queue_size인 queue를 두어서
+    뒤 단계가 밀리면 앞 단계가 기다리도록 한다. 보고서만 run()이 끝난 뒤에 모든 결과로 만든다.
+
+    파일이 겹치는 PR은 MergeScheduler.plan과 같이 번호가 작은 PR부터 하나씩 merge하므로 어느 PR이 충돌로 실패할지는 매번 같다.
+    merge된 PR은 열린 PR 목록에서 빠져서 다음 페이지의 PR이 앞으로 당겨지므로, merge는 PR 목록을 끝까지 받은 뒤에 시작한다.
+    그 뒤로는 번호가 더 작은 PR이 모두 파싱된 PR부터 merge 하므로 merge와 나머지 PR의 파일 목록 fetch가 겹친다.
+    그래서 파일 목록은 PR 목록 순서가 아니라 번호가 작은 PR부터 받는다.
+    merge를 기다리는 PR이 merge_workers개 이상이면 검사 결과를 더 받지 않아서 앞 단계가 기다린다.
+    journal이 있으면 merge를 시작하기 전에 PR 목록을 list로, 검사 결과는 micro-batch마다 merge하기 전에 기록한다.
+    그래서 merge 중에 멈추면 resume 할 때 기록된 PR 목록과 검사 결과를 사용한다 (merge된 PR은 목록에서 빠지므로).
+    PullRequestGitMerger처럼 한 번에 push하는 merger는 검사가 모두 끝난 뒤에 merge한다.
+    """
+    def __init__(
+        self,
+        fetcher: PullRequestFetcher | PullRequestGraphQLFetcher,
+        validator: PullRequestValidator,
+        merger: PullRequestMerger,
+        journal: RunJournal | None = None,
+        fetch_workers: int = 8,
+        queue_size: int = 32,
+        validate_batch: int = 16
+    ):
+        self.fetcher = fetcher
+        self.validator = validator
+        self.merger = merger
+        self.journal = journal
+        self.fetch_workers = max(1, fetch_workers)
+        self.validate_batch = max(1, validate_batch)
+        self.merge_workers = max(1, merger.max_workers)
+        # 받은 페이지의 PR이므로 크기를 제한하지 않아서 목록을 바로 끝까지 받는다.
+        # merge는 번호가 작은 PR이 모두 파싱되어야 시작할 수 있으므로 번호가 작은 PR의 파일 목록부터 받는다
+        self.pulls: queue.PriorityQueue = queue.PriorityQueue()
+        self.files: queue.Queue = queue.Queue(queue_size)
+        self.validated: queue.Queue = queue.Queue(queue_size)
+        self.pull_requests: Dict[int, Dict] = {}
+        self.pull_request_files: Dict[int, List[Dict]] = {}
+        self.validation_results: Dict[int, PullRequestValidationResult] = {}
+        self.results: Dict[int, MergePullRequestResult] = {}
+        self.merged: Dict[int, MergeResult] = {}
+        self.parsed: Dict[int, PullRequest] = {}
+        # PR 목록을 끝까지 받은 뒤의 PR 번호들 (오름차순)
+        self.listed: List[int] = []
+        # 아래는 merge 단계의 thread에서만 사용한다
+        # PR 번호 -> 먼저 merge 해야 하는 PR 번호들. 번호가 더 작은 PR이 모두 파싱된 PR만 들어 있다
+        self.earlier: Dict[int, Set[int]] = {}
+        self.owners: Dict[str, List[int]] = {}
+        # merge가 끝났거나 merge하지 않는 PR 번호
+        self.settled: Set[int] = set()
+        self.completions: queue.Queue = queue.Queue()
+        self.errors: List[BaseException] = []
+        self._stop = threading.Event()
+        self._listed = threading.Event()
+        self._lock = threading.Lock()
+
+    def put(self, q: queue.Queue, item: Any):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise PipelineStopped
+
+    def get(self, q: queue.Queue) -> Any:
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        raise PipelineStopped
+
+    def poll(self, q: queue.Queue, timeout: float = 0.1) -> Any:
+        """timeout 안에 받지 못하면 None"""
+        if self._stop.is_set():
+            raise PipelineStopped
+        try:
+            return q.get(timeout=timeout) if timeout else q.get_nowait()
+        except queue.Empty:
+            return None
+
+    def get_batch(self, q: queue.Queue, size: int) -> List[Any]:
+        """하나는 기다려서 받고, 이미 들어와 있는 것은 size개까지 같이 받는다"""
+        batch = [self.get(q)]
+        while len(batch) < size and batch[-1] is not DONE:
+            try:
+                batch.append(q.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def streams_merge(self) -> bool:
+        return self.merger.streams and not self.merger.skip_merge
+
+    def list_pull_requests(self):
+        pull_requests = []
+        for index, p in enumerate(self.fetcher.iter_pull_requests()):
+            pull_requests.append(p)
+            self.put(self.pulls, (p["number"], index, p))
+        self.listing_completed(pull_requests)
+        for i in range(self.fetch_workers):
+            self.put(self.pulls, (math.inf, i, DONE))
+
+    def fetch_files(self):
+        while (item := self.get(self.pulls))[-1] is not DONE:
+            number, index, p = item
+            self.put(self.files, (index, p, list(self.fetcher.iter_pull_request_files(number))))
+        self.put(self.files, DONE)
+
+    def fetch_graphql(self):
+        # GraphQL은 PR 목록과 파일 목록을 한 쿼리로 가져오므로 fetch 단계가 하나다
+        pull_requests = []
+        for index, (p, files) in enumerate(self.fetcher.stream()):
+            pull_requests.append(p)
+            self.put(self.files, (index, p, files))
+        self.listing_completed(pull_requests)
+        self.put(self.files, DONE)
+
+    def validate(self, producers: int):
+        finished = 0
+        while finished < producers:
+            batch = []
+            for item in self.get_batch(self.files, self.validate_batch):
+                if item is DONE:
+                    finished += 1
+                    continue
+                index, p, files = item
+                self.pull_requests[index] = p
+                self.pull_request_files[p["number"]] = files
+                pull_request = PullRequestParser.parse_pull_request(p, files)
+                self.parsed[pull_request.number] = pull_request
+                batch.append((index, pull_request))
+            if batch:
+                results = self.validator.get_validation_result([pull_request for _, pull_request in batch])
+                if self.journal:
+                    self.journal.write("validate_batch", results=results)
+                for (index, _), result in zip(batch, results):
+                    self.validation_results[index] = result
+                    if self.streams_merge():
+                        self.put(self.validated, (index, result))
+        if self.journal:
+            self.journal.write("fetch", pull_requests=self.get_pull_requests(), pull_request_files=self.pull_request_files)
+            self.journal.write("validate", results=self.get_validation_results())
+        if self.streams_merge():
+            self.put(self.validated, DONE)
+
+    def listing_completed(self, pull_requests: List[Dict]):
+        """PR 목록을 끝까지 받았을 때 한 번 부른다. 이후에 merge를 시작한다"""
+        if self.journal:
+            self.journal.write("list", pull_requests=pull_requests)
+        self.listed = sorted({p["number"] for p in pull_requests})
+        self._listed.set()
+
+    def index_parsed(self):
+        """번호가 더 작은 PR이 모두 파싱된 PR까지 먼저 merge 해야 하는 PR을 구한다"""
+        while len(self.earlier) < len(self.listed) and (pull_request := self.parsed.get(self.listed[len(self.earlier)])):
+            self.earlier[pull_request.number] = MergeScheduler.add_conflicts(self.owners, pull_request)
+
+    def accept(self, index: int, item: PullRequestValidationResult, pending: Dict[int, Tuple[int, PullRequestValidationResult]]):
+        number = item.pull_request.number
+        if not item.validation_result:
+            self.settle(index, item, MergeResult())
+        elif number in self.merged:
+            self.settle(index, item, self.merged[number])
+        else:
+            pending[number] = (index, item)
+
+    def settle(self, index: int, item: PullRequestValidationResult, merge_result: MergeResult):
+        self.results[index] = MergePullRequestResult(merge=merge_result, validation=item)
+        self.settled.add(item.pull_request.number)
+
+    def dispatch(
+        self,
+        executor: ThreadPoolExecutor,
+        pending: Dict[int, Tuple[int, PullRequestValidationResult]],
+        running: Dict[Future, Tuple[int, PullRequestValidationResult]]
+    ) -> int:
+        """파일이 겹치는 더 작은 번호의 PR이 모두 끝난 PR을 비어 있는 worker에서 merge 한다.
+        차례가 됐지만 worker가 없어서 기다리는 PR 수를 반환
+        """
+        # PR 목록을 끝까지 받기 전에는 어느 PR이 먼저인지 알 수 없으므로 모아두기만 한다
+        if not self._listed.is_set():
+            return 0
+        self.index_parsed()
+        waiting = 0
+        for number in sorted(pending):
+            if number not in self.earlier or not self.earlier[number] <= self.settled:
+                continue
+            if len(running) >= self.merge_workers:
+                waiting += 1
+                continue
+            index, item = pending.pop(number)
+            future = executor.submit(self.merger.merge_journaled, number)
+            running[future] = (index, item)
+            future.add_done_callback(self.completions.put)
+        return waiting
+
+    def merge(self):
+        """검사 결과를 받아서 merge 할 차례가 된 PR을 merge_workers개의 thread에서 merge 한다. 순서는 이 thread 하나에서 정한다"""
+        pending: Dict[int, Tuple[int, PullRequestValidationResult]] = {}
+        running: Dict[Future, Tuple[int, PullRequestValidationResult]] = {}
+        finished = False
+        waiting = 0
+        with ThreadPoolExecutor(max_workers=self.merge_workers, thread_name_prefix="pipeline-merge") as executor:
+            while not finished or pending or running:
+                # 끝난 merge를 먼저 반영한다. 검사 결과를 다 받았거나 worker에 넘길 PR이 충분하면 merge가 끝나기를 기다린다
+                receiving = not finished and waiting < self.merge_workers
+                future = self.poll(self.completions, timeout=0 if receiving else 0.1)
+                if future is not None:
+                    index, item = running.pop(future)
+                    self.settle(index, item, future.result())
+                elif receiving:
+                    item = self.poll(self.validated, timeout=0.01 if running else 0.1)
+                    if item is DONE:
+                        finished = True
+                    elif item is not None:
+                        self.accept(*item, pending)
+                waiting = self.dispatch(executor, pending, running)
+
+    def run_stage(self, stage: Callable, *args):
+        try:
+            stage(*args)
+        except PipelineStopped:
+            pass
+        except BaseException as ex:
+            with self._lock:
+                self.errors.append(ex)
+            self._stop.set()
+
+    def stages(self) -> Iterator[Tuple[Callable, tuple]]:
+        if isinstance(self.fetcher, PullRequestGraphQLFetcher):
+            yield self.fetch_graphql, ()
+            producers = 1
+        else:
+            yield self.list_pull_requests, ()
+            for _ in range(self.fetch_workers):
+                yield self.fetch_files, ()
+            producers = self.fetch_workers
+        yield self.validate, (producers,)
+        if self.streams_merge():
+            yield self.merge, ()
+
+    def run(self) -> List[MergePullRequestResult]:
+        """PR 목록 순서대로 merge 결과를 반환. 어느 단계에서든 예외가 나면 모든 단계를 멈추고 그 예외를 발생시킨다"""
+        if self.streams_merge():
+            self.merged = self.merger.journaled_merge_results()
+        threads = [
+            threading.Thread(target=self.run_stage, args=(stage, *args), name=f"pipeline-{stage.__name__}", daemon=True)
+            for stage, args in self.stages()
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.errors:
+            raise self.errors[0]
+
+        validation_results = self.get_validation_results()
+        if self.streams_merge():
+            self.merger.results.extend(self.results[index] for index in sorted(self.results))
+        else:
+            self.merger.merge(validation_results)
+        log.info(f"Pipeline processed {len(validation_results)} pull requests")
+        return self.merger.get_merge_result()
+
+    def get_pull_requests(self) -> List[Dict]:
+        return [self.pull_requests[index] for index in sorted(self.pull_requests)]
+
+    def get_validation_results(self) -> List[PullRequestValidationResult]:
+        return [self.validation_results[index] for index in sorted(self.validation_results)]
@@ -1,58 +1,84 @@
 import re 
+from functools import lru_cache
+from typing import List
 from datetime import datetime, timedelta
 
-from utils import DateUtil
+from utils import DateUtil, Roster
 from configs import settings
-from models import PullRequest, CommitFile
+from models import PullRequest, CommitFileBatch
+
+# settings.validator의 값이 바뀌면 새로 컴파일하고, 그렇지 않으면 컴파일된 객체를 재사용한다
+@lru_cache(maxsize=32)
+def compile_pattern(pattern: str, flags: int = 0) -> re.Pattern:
+    return re.compile(pattern, flags)
+
 class Validation:
     @staticmethod
     def is_valid_userid(pr: PullRequest):
-        return settings.github.get_name_from_id(pr.user_id) is not None
+        return Roster.shared().name(pr.user_id) is not None
     
     @staticmethod
     def is_valid_title_format(pr: PullRequest):
-        return bool(re.match(settings.validator.TITLE_PATTERN, pr.title.strip(), re.IGNORECASE))
+        return bool(compile_pattern(settings.validator.TITLE_PATTERN, re.IGNORECASE).match(pr.title.strip()))
     
     @staticmethod
-    def is_valid_title_date(pr: PullRequest):
+    def is_valid_title_date(pr: PullRequest, reference_date: datetime | None = None):
+        """타이틀의 날짜가 reference_date(기본값: 어제)와 같은지 검사"""
         title_date = DateUtil.datetome_from_title(pr.title.split()[-1])
-        return DateUtil.is_same_day(title_date, datetime.now()-timedelta(days=1))
+        return DateUtil.is_same_day(title_date, reference_date or datetime.now()-timedelta(days=1))
     
     @staticmethod
     def is_valid_label(pr: PullRequest):
-        name = settings.github.get_name_from_id(pr.user_id)
-        return name in pr.labels
+        return Roster.shared().name(pr.user_id) in pr.labels
     
+    # 아래의 파일 검사는 CommitFileBatch의 열을 그대로 읽고, 통과하지 못한 파일의 index를 반환한다
     @staticmethod
-    def has_no_special_in_file(file: CommitFile):
-        return not bool(re.search(settings.validator.FORBIDEN_PATTERN, file.toString()))
+    def invalid_special_in_files(batch: CommitFileBatch) -> List[int]:
+        """파일명에 공백이나 특수문자가 있는 파일"""
+        pattern = compile_pattern(settings.validator.FORBIDEN_PATTERN)
+        return [
+            i for i, (prefix, filename, extension) in enumerate(zip(batch.prefixes, batch.filenames, batch.extensions))
+            if pattern.search(f"{prefix}{filename}.{extension}" if extension else f"{prefix}{filename}")
+        ]
     
     @staticmethod
-    def is_firstchar_not_digit(file: CommitFile):
-        return (file.prefix != "" or not file.filename[0].isdigit())
+    def invalid_firstchar_digit_files(batch: CommitFileBatch) -> List[int]:
+        """prefix 없이 숫자로 시작하는 파일"""
+        return [
+            i for i, (prefix, filename) in enumerate(zip(batch.prefixes, batch.filenames))
+            if prefix == "" and filename[0].isdigit()
+        ]
     
     @staticmethod
-    def is_valid_file_path(file: CommitFile):
-        return len(file.path) == 2 and file.path[1].upper() in settings.validator.ALLOWED_FOLDERNAMES
+    def invalid_path_files(batch: CommitFileBatch) -> List[int]:
+        """허용된 폴더 바로 아래에 있지 않은 파일. 같은 폴더의 파일은 path 객체를 공유하므로 폴더마다 한 번만 검사한다"""
+        folders = settings.validator.ALLOWED_FOLDERNAMES
+        valid = {path: len(path) == 2 and path[1].upper() in folders for path in set(batch.paths)}
+        return [i for i, path in enumerate(batch.paths) if not valid[path]]
     
     @staticmethod
-    def is_valid_file_extension(file: CommitFile):
-        return (
-            file.extension.lower() in settings.validator.ALLOWED_EXTENSIONS
-            if file.extension
-            else False
-        )
-        
+    def invalid_extension_files(batch: CommitFileBatch) -> List[int]:
+        """확장자가 없거나 허용되지 않은 파일"""
+        allowed = settings.validator.ALLOWED_EXTENSIONS
+        valid = {e: bool(e) and e.lower() in allowed for e in set(batch.extensions)}
+        return [i for i, extension in enumerate(batch.extensions) if not valid[extension]]
     
     @staticmethod
-    def is_valid_file_format(file: CommitFile):
+    def invalid_format_files(batch: CommitFileBatch) -> List[int]:
+        """FILENAME_DELIMITER로 나눴을 때 두 부분이 아닌 파일"""
         delimeter = settings.validator.FILENAME_DELIMITER
-        return len(file.filename.split(delimeter)) == 2
+        return [i for i, filename in enumerate(batch.filenames) if filename.count(delimeter) != 1]
     
     @staticmethod
-    def is_valid_file_prefix_after_num(file: CommitFile):
-        return bool(file.prefix == "" or file.filename[0].isdigit())
+    def invalid_prefix_after_num_files(batch: CommitFileBatch) -> List[int]:
+        """prefix가 있는데 숫자로 시작하지 않는 파일"""
+        return [
+            i for i, (prefix, filename) in enumerate(zip(batch.prefixes, batch.filenames))
+            if prefix != "" and not filename[0].isdigit()
+        ]
     
     @staticmethod
-    def is_valid_file_username(file: CommitFile, pr: PullRequest):
-        return file.filename.split('_')[-1] == settings.github.get_name_from_id(pr.user_id)
\ No newline at end of file
+    def invalid_username_files(batch: CommitFileBatch, pr: PullRequest) -> List[int]:
+        """파일명의 마지막 `_` 뒤가 PR 작성자의 이름이 아닌 파일"""
+        name = Roster.shared().name(pr.user_id)
+        return [i for i, filename in enumerate(batch.filenames) if filename.rpartition('_')[2] != name]
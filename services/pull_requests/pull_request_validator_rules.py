@@ -0,0 +1,90 @@
+from typing import Callable, List
+
+from models import CommitFile, CommitFileBatch
+from utils import FileUtil
+from .rule_registry import RuleRegistry, ValidationContext, Flags
+from .pull_request_validator_helper import Validation
+
+rules = RuleRegistry()
+
+def invalid_files(
+    context: ValidationContext,
+    find_invalid: Callable[[CommitFileBatch], List[int]],
+    to_string: Callable[[CommitFile], str] = CommitFile.toString
+) -> List[str]:
+    # CommitFile은 오류 메시지에 넣을 파일만 만든다
+    batch = context.commit_file_batch
+    return [to_string(batch[i]) for i in find_invalid(batch)]
+
+@rules.register(provides=Flags.USER_ID)
+def validate_user_id(context: ValidationContext) -> str | None:
+    """user_id가 있는지 검사"""
+    if not Validation.is_valid_userid(context.pull_request):
+        return "알 수 없는 user_id 입니다."
+
+@rules.register(requires=[Flags.USER_ID], provides=Flags.TITLE)
+def validate_title_format(context: ValidationContext) -> str | None:
+    """Pull Request의 타이틀 형식이 [Baekjoon] yy-mm-dd인지 검사. 대소문자 무시"""
+    if not Validation.is_valid_title_format(context.pull_request):
+        return "잘못된 타이틀 형식입니다."
+
+@rules.register(requires=[Flags.TITLE, Flags.USER_ID], volatile=True)
+def validate_title_date(context: ValidationContext) -> str | None:
+    """ Pull Request의 Title과 Created_time을 검증하는 함수. \n
+    예시로 23년 3월 22일에 검증 진행 시 [Baekjoon] 23-03-21 의 이름을 가진 PR만 허용
+    """
+    if not Validation.is_valid_title_date(context.pull_request, context.reference_date):
+        return "타이틀의 날짜가 일치하지 않습니다."
+
+@rules.register(requires=[Flags.USER_ID])
+def validate_labels(context: ValidationContext) -> str | None:
+    """label에 이름이 있는지 검사"""
+    if not Validation.is_valid_label(context.pull_request):
+        return "Label에 이름이 없습니다."
+
+@rules.register(requires=[Flags.USER_ID], provides=Flags.FILE_SPECIAL)
+def validate_file_no_special(context: ValidationContext) -> str | None:
+    """파일명에 공백이나 특수문자가 있는지 검사"""
+    if files := invalid_files(context, Validation.invalid_special_in_files):
+        return f'파일명에 공백이나 특수문자가 있습니다. ({FileUtil.format_content(files)})'
+
+@rules.register(requires=[Flags.FILE_SPECIAL])
+def validate_file_firstchar_not_digit(context: ValidationContext) -> str | None:
+    """파일명이 숫자로 시작하지 않는지 검사"""
+    if files := invalid_files(context, Validation.invalid_firstchar_digit_files):
+        return f'파일명이 숫자로 시작합니다. ({FileUtil.format_content(files)})'
+
+@rules.register(requires=[Flags.FILE_SPECIAL])
+def validate_file_path(context: ValidationContext) -> str | None:
+    """파일이 올바른 위치에 있는지 검사. 
+    예시) baekjoon/정수론 폴더에 있는지 확인.
+    """
+    if files := invalid_files(context, Validation.invalid_path_files, CommitFile.toFullString):
+        return f'파일이 올바른 위치에 있지 않습니다. ({FileUtil.format_content(files)})'
+
+@rules.register(requires=[Flags.FILE_SPECIAL])
+def validate_file_extension(context: ValidationContext) -> str | None:
+    """파일명의 확장자가 올바른지 검사"""
+    if files := invalid_files(context, Validation.invalid_extension_files):
+        return f'허용되지 않는 확장자입니다. ({FileUtil.format_content(files)})'
+
+@rules.register(requires=[Flags.FILE_SPECIAL], provides=Flags.FILE_FORMAT)
+def validate_file_format(context: ValidationContext) -> str | None:
+    """파일명의 형식이 문제명_이름 으로 되어있는지 검사.\n
+    `_` 를 기준으로 파일명을 분리해서 길이가 2인지 아닌지 검사한다.
+    """
+    if files := invalid_files(context, Validation.invalid_format_files):
+        return f'파일명의 형식이 올바르지 않습니다. ({FileUtil.format_content(files)})'
+
+@rules.register(requires=[Flags.FILE_FORMAT])
+def validate_file_prefix_after_num(context: ValidationContext) -> str | None:
+    """`H_` 로 시작하는데 다음에 숫자가 없는 경우 검사한다."""
+    if files := invalid_files(context, Validation.invalid_prefix_after_num_files):
+        return f'숫자로 시작하지 않는 파일명에 H_ 키워드가 있습니다. ({FileUtil.format_content(files)})'
+
+@rules.register(requires=[Flags.FILE_FORMAT])
+def validate_file_username(context: ValidationContext) -> str | None:
+    """파일명의 이름이 올바른지 검사. 다른 유저의 파일을 커밋/삭제 하는 경우를 방지하기 위함"""
+    pr = context.pull_request
+    if files := invalid_files(context, lambda batch: Validation.invalid_username_files(batch, pr)):
+        return f'파일명에서 이름을 찾을 수 없습니다. ({FileUtil.format_content(files)})'
@@ -0,0 +1,158 @@
+import hashlib
+from enum import Enum
+from datetime import datetime
+from types import CodeType
+from functools import cached_property
+from typing import Callable, Dict, List, Set
+
+from models import PullRequest, CommitFileBatch, ValidationResult
+from utils import FileUtil
+from configs import settings
+
+class Flags(Enum):
+    TITLE = 1
+    USER_ID = 2
+    FILE_SPECIAL = 3
+    FILE_FORMAT = 4
+
+class ValidationContext:
+    """한 Pull Request를 검사하는 동안 규칙들이 공유하는 입력값"""
+    def __init__(self, pull_request: PullRequest, reference_date: datetime | None = None):
+        self.pull_request = pull_request
+        # 타이틀의 날짜와 비교할 날짜. None이면 어제 날짜를 사용한다
+        self.reference_date = reference_date
+
+    @cached_property
+    def commit_file_batch(self) -> CommitFileBatch:
+        return FileUtil.tokenize(self.pull_request.files)
+
+# 실패 사유를 반환하고, 통과하면 None을 반환하는 검사 함수
+RulePredicate = Callable[[ValidationContext], str | None]
+
+def code_fingerprint(code: CodeType) -> str:
+    consts = tuple(
+        code_fingerprint(const) if isinstance(const, CodeType) else repr(const)
+        for const in code.co_consts
+    )
+    return repr((code.co_code, consts, code.co_names))
+
+class Rule:
+    def __init__(
+        self,
+        name: str,
+        predicate: RulePredicate,
+        requires: List[Flags],
+        provides: Flags | None,
+        volatile: bool = False
+    ):
+        self.name = name
+        self.predicate = predicate
+        self.requires = frozenset(requires)
+        self.provides = provides
+        # 같은 입력이라도 실행 시점에 따라 결과가 달라지는 규칙 (ex. 날짜 비교). 캐시된 결과를 재사용하지 않는다
+        self.volatile = volatile
+
+    def signature(self) -> str:
+        return repr((
+            self.name,
+            sorted(flag.name for flag in self.requires),
+            self.provides.name if self.provides else None,
+            self.volatile,
+            code_fingerprint(self.predicate.__code__)
+        ))
+
+class RuleRegistry:
+    """검사 규칙 목록.
+
+    각 규칙은 통과해야 하는 선행 Flag(requires)와 통과 시 얻는 Flag(provides)를 선언한다.
+    선언된 의존 관계로 DAG를 만들어 실행 순서를 정하고, 규칙이 실패하면 그 규칙에 의존하는
+    규칙들을 한꺼번에 건너뛴다.
+    """
+    def __init__(self):
+        self.rules: List[Rule] = []
+        self._order: List[Rule] | None = None
+        self._dependents: Dict[str, Set[str]] = {}
+        self._volatile: Set[str] = set()
+
+    def register(self, requires: List[Flags] | None = None, provides: Flags | None = None, volatile: bool = False):
+        def decorator(predicate: RulePredicate) -> RulePredicate:
+            if provides is not None and any(rule.provides == provides for rule in self.rules):
+                raise ValueError(f"{provides} is already provided by another rule")
+            self.rules.append(Rule(predicate.__name__, predicate, requires or [], provides, volatile))
+            self._order = None
+            return predicate
+        return decorator
+
+    def order(self) -> List[Rule]:
+        """위상 정렬된 규칙 목록. 순서가 정해지지 않은 규칙끼리는 등록 순서를 따른다."""
+        if self._order is not None:
+            return self._order
+
+        providers = {rule.provides: rule for rule in self.rules if rule.provides is not None}
+        depends_on: Dict[str, Set[str]] = {}
+        for rule in self.rules:
+            if missing := [flag for flag in rule.requires if flag not in providers]:
+                raise ValueError(f"{rule.name} requires {missing} but no rule provides it")
+            depends_on[rule.name] = {providers[flag].name for flag in rule.requires}
+
+        order: List[Rule] = []
+        done: Set[str] = set()
+        while len(order) < len(self.rules):
+            ready = next(
+                (rule for rule in self.rules if rule.name not in done and depends_on[rule.name] <= done),
+                None
+            )
+            if ready is None:
+                raise ValueError("Rule dependencies have a cycle")
+            order.append(ready)
+            done.add(ready.name)
+
+        # 규칙 이름 -> 그 규칙에 (간접적으로) 의존하는 규칙 이름들
+        dependents: Dict[str, Set[str]] = {rule.name: set() for rule in self.rules}
+        for rule in reversed(order):
+            for name in depends_on[rule.name]:
+                dependents[name] |= {rule.name} | dependents[rule.name]
+
+        # volatile 규칙에 의존하는 규칙도 결과를 재사용할 수 없다
+        volatile = set()
+        for rule in order:
+            if rule.volatile:
+                volatile |= {rule.name} | dependents[rule.name]
+
+        self._dependents = dependents
+        self._volatile = volatile
+        self._order = order
+        return order
+
+    def is_volatile(self, name: str) -> bool:
+        self.order()
+        return name in self._volatile
+
+    def version(self) -> str:
+        """규칙 구성이나 구현이 바뀌면 달라지는 값"""
+        return hashlib.sha256("\n".join(rule.signature() for rule in self.order()).encode()).hexdigest()
+
+    def evaluate(self, context: ValidationContext, cached: List[ValidationResult] | None = None) -> List[ValidationResult]:
+        """규칙을 순서대로 실행한다.
+        cached가 주어지면 volatile이 아닌 규칙은 실행하지 않고 cached의 결과를 사용한다.
+        """
+        cached_results = None if cached is None else {res.validation: res for res in cached}
+        results: List[ValidationResult] = []
+        skipped: Set[str] = set()
+        for rule in self.order():
+            if rule.name in skipped:
+                continue
+            if cached_results is not None and rule.name not in self._volatile:
+                if (result := cached_results.get(rule.name)) is None:
+                    continue
+            else:
+                reason = rule.predicate(context)
+                result = ValidationResult(
+                    validation=rule.name,
+                    result=reason is None,
+                    reason=settings.validator.DEFAULT_REASON if reason is None else reason
+                )
+            results.append(result)
+            if not result.result:
+                skipped |= self._dependents[rule.name]
+        return results
@@ -0,0 +1,134 @@
+import os
+import json
+import inspect
+import sqlite3
+import hashlib
+import logging
+import threading
+from dataclasses import asdict
+from typing import Dict, List, Tuple
+
+from models import PullRequest, ValidationResult
+from configs import settings
+from utils import DateUtil, FileUtil, Roster
+from .rule_registry import RuleRegistry
+from . import pull_request_validator_helper
+log = logging.getLogger(__name__)
+
+# SQLite의 변수 개수 제한(SQLITE_MAX_VARIABLE_NUMBER)보다 작게 나눠서 조회한다
+QUERY_CHUNK_SIZE = 500
+
+class ValidationCache:
+    """Pull Request 검사 결과를 SQLite에 저장해두고, 바뀌지 않은 PR은 다시 검사하지 않도록 한다.
+
+    key는 PR 번호, head SHA, 타이틀, 라벨, 파일 목록과 규칙 버전으로 만든다.
+    규칙 버전은 등록된 규칙, 검사에 쓰이는 모듈의 소스와 settings.validator 값으로 계산하므로
+    설정이나 규칙이 바뀌면 저장된 결과는 자동으로 무효화된다.
+    명단(Roster)은 상주 모드에서 실행 중에 바뀔 수 있으므로 규칙 버전 대신 key에 포함한다.
+    """
+    def __init__(self, path: str, registry: RuleRegistry):
+        self.path = path
+        self.registry = registry
+        self.rule_version = self.compute_rule_version(registry)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS validation_results (
+                    number INTEGER PRIMARY KEY,
+                    key TEXT NOT NULL,
+                    rule_version TEXT NOT NULL,
+                    details TEXT NOT NULL
+                )
+                """
+            )
+            self.connection.execute(
+                "DELETE FROM validation_results WHERE rule_version != ?",
+                (self.rule_version,)
+            )
+
+    @staticmethod
+    def settings_snapshot() -> str:
+        values = {
+            name: getattr(settings.validator, name)
+            for name in dir(settings.validator)
+            if name.isupper()
+        }
+        return json.dumps(values, sort_keys=True, default=repr, ensure_ascii=False)
+
+    @classmethod
+    def compute_rule_version(cls, registry: RuleRegistry) -> str:
+        sources = [
+            inspect.getsource(module)
+            for module in (pull_request_validator_helper, inspect.getmodule(FileUtil), inspect.getmodule(DateUtil), inspect.getmodule(Roster))
+        ]
+        return hashlib.sha256(
+            "\n".join([registry.version(), cls.settings_snapshot(), *sources]).encode()
+        ).hexdigest()
+
+    def key(self, pull_request: PullRequest) -> str:
+        return hashlib.sha256(json.dumps([
+            pull_request.number,
+            pull_request.head_sha,
+            pull_request.title,
+            pull_request.user_id,
+            sorted(pull_request.labels),
+            pull_request.files,
+            self.rule_version,
+            Roster.shared().version
+        ], ensure_ascii=False).encode()).hexdigest()
+
+    def get_many(self, pull_requests: List[PullRequest]) -> Dict[int, List[ValidationResult]]:
+        """PR 번호 -> 저장된 검사 결과. key가 바뀐 PR은 포함하지 않는다"""
+        keys = {p.number: self.key(p) for p in pull_requests}
+        numbers = list(keys)
+        rows = []
+        # pipeline에서는 적은 수의 PR로 여러 번 부르므로 테이블 전체가 아니라 요청한 PR만 읽는다
+        with self._lock:
+            for start in range(0, len(numbers), QUERY_CHUNK_SIZE):
+                chunk = numbers[start:start + QUERY_CHUNK_SIZE]
+                rows += self.connection.execute(
+                    f"SELECT number, key, details FROM validation_results WHERE rule_version = ? AND number IN ({', '.join('?' * len(chunk))})",
+                    (self.rule_version, *chunk)
+                ).fetchall()
+        cached = {
+            number: [ValidationResult(**detail) for detail in json.loads(details)]
+            for number, key, details in rows
+            if keys.get(number) == key
+        }
+        self.hits += len(cached)
+        self.misses += len(keys) - len(cached)
+        return cached
+
+    def put_many(self, results: List[Tuple[PullRequest, List[ValidationResult]]]):
+        rows = [
+            (
+                pull_request.number,
+                self.key(pull_request),
+                self.rule_version,
+                json.dumps(
+                    [asdict(d) for d in details if not self.registry.is_volatile(d.validation)],
+                    ensure_ascii=False
+                )
+            )
+            for pull_request, details in results
+        ]
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO validation_results (number, key, rule_version, details) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def log_stats(self):
+        log.info(f"Validation cache stats: {self.stats()}")
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,5 @@
+from utils.lazy_module import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "WebhookServer": ".webhook_server",
+})
\ No newline at end of file
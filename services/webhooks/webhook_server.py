@@ -0,0 +1,232 @@
+import hmac
+import asyncio
+import hashlib
+import logging
+import pytz
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List
+from aiohttp import web
+
+from models import MergePullRequestResult, project
+from utils import DiscordMessageBuilder, DateUtil, Roster
+from ..pull_requests import PullRequestFetcher, PullRequestParser, PullRequestValidator, PullRequestMerger
+log = logging.getLogger(__name__)
+
+class WebhookServer:
+    """Github pull_request webhook을 받아서 PR이 올라오는 대로 검사하고 merge 하는 상주 서버.
+
+    같은 PR에 대한 이벤트가 debounce_seconds 안에 여러 번 들어오면 마지막 payload 한 번만 처리한다.
+    처리 결과는 PR 번호별로 모아두었다가 매일 report_hour시(한국 시간)나 POST /report 요청 시에
+    DiscordMessageBuilder.build_report로 보고한다. auto_report가 False이면 POST /report로만 보고한다.
+
+    Github은 전달에 실패한 webhook을 다시 보내지 않으므로 report 전에 열린 PR 목록을 가져와서
+    결과가 없거나 head가 바뀌었거나 이전 report 날짜로 검사한 PR을 다시 처리한다.
+    merge된 PR의 결과는 report 후에 비우고, merge되지 않은 PR의 결과는 PR이 닫힐 때까지 남겨둔다.
+
+    POST /webhook  Github webhook payload
+    GET  /results  지금까지 모인 처리 결과
+    POST /report   모인 결과로 report를 보내고 merge된 PR의 결과를 비운다
+    """
+    ACTIONS = {"opened", "reopened", "edited", "synchronize", "labeled", "unlabeled"}
+
+    def __init__(
+        self,
+        fetcher: PullRequestFetcher,
+        validator: PullRequestValidator,
+        merger: PullRequestMerger,
+        message_builder: DiscordMessageBuilder,
+        notify: Callable[[List[str]], None],
+        secret: str | None = None,
+        debounce_seconds: float = 5.0,
+        report_hour: int = 9,
+        auto_report: bool = True
+    ):
+        self.fetcher = fetcher
+        self.validator = validator
+        self.merger = merger
+        self.message_builder = message_builder
+        self.notify = notify
+        self.secret = secret
+        self.debounce_seconds = debounce_seconds
+        self.report_hour = report_hour
+        self.auto_report = auto_report
+        self.results: Dict[int, MergePullRequestResult] = {}
+        # PR 번호 -> 검사할 때 기준으로 삼은 report 날짜
+        self.report_dates: Dict[int, date] = {}
+        self._pending: Dict[int, dict] = {}
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+
+    def application(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/webhook", self.handle_webhook)
+        app.router.add_get("/results", self.handle_results)
+        app.router.add_post("/report", self.handle_report)
+        if self.auto_report:
+            app.cleanup_ctx.append(self.report_schedule)
+        return app
+
+    async def report_schedule(self, app: web.Application):
+        task = asyncio.create_task(self.report_loop())
+        yield
+        task.cancel()
+
+    async def report_loop(self):
+        timezone = pytz.timezone('Asia/Seoul')
+        while True:
+            now = datetime.now(timezone)
+            next_report = now.replace(hour=self.report_hour, minute=0, second=0, microsecond=0)
+            if next_report <= now:
+                next_report += timedelta(days=1)
+            await asyncio.sleep((next_report - now).total_seconds())
+            try:
+                await self.report()
+            except Exception as ex:
+                log.exception(ex)
+
+    def run(self, host: str = "127.0.0.1", port: int = 8080):
+        web.run_app(self.application(), host=host, port=port, print=None)
+
+    def is_valid_signature(self, body: bytes, signature: str | None) -> bool:
+        if self.secret is None:
+            return True
+        expected = "sha256=" + hmac.new(self.secret.encode(), body, hashlib.sha256).hexdigest()
+        return signature is not None and hmac.compare_digest(expected, signature)
+
+    async def handle_webhook(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        if not self.is_valid_signature(body, request.headers.get("X-Hub-Signature-256")):
+            return web.json_response({"message": "invalid signature"}, status=401)
+
+        event = request.headers.get("X-GitHub-Event")
+        if event == "ping":
+            return web.json_response({"message": "pong"})
+        if event != "pull_request":
+            return web.json_response({"message": f"ignored event {event}"}, status=202)
+
+        payload = await request.json()
+        pull_request = payload.get("pull_request") or {}
+        number = pull_request.get("number")
+        action = payload.get("action")
+        if number is None:
+            return web.json_response({"message": "pull_request.number is missing"}, status=400)
+
+        if action == "closed":
+            self.cancel(number)
+            self.forget(number)
+        elif action in self.ACTIONS and pull_request.get("state", "open") == "open":
+            # debounce 동안 기다리는 PR은 검사에 쓰는 field만 들고 있는다
+            self.schedule(number, project(pull_request, PullRequestParser.pull_request_fields))
+        return web.json_response({"number": number, "action": action}, status=202)
+
+    def schedule(self, number: int, pull_request: dict):
+        """debounce_seconds 동안 같은 PR의 이벤트가 더 오지 않으면 처리한다"""
+        self._pending[number] = pull_request
+        if timer := self._timers.pop(number, None):
+            timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timers[number] = loop.call_later(self.debounce_seconds, self._start, number)
+
+    def cancel(self, number: int):
+        self._pending.pop(number, None)
+        if timer := self._timers.pop(number, None):
+            timer.cancel()
+
+    def forget(self, number: int):
+        """닫힌 PR의 결과를 버린다. merge된 PR은 report에 나가야 하므로 report 후에 비운다"""
+        if (result := self.results.get(number)) is not None and not result.merge.merged:
+            self.results.pop(number)
+            self.report_dates.pop(number, None)
+
+    def _start(self, number: int):
+        self._timers.pop(number, None)
+        task = asyncio.create_task(self.process(number))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def process(self, number: int):
+        async with self._lock:
+            if (pull_request := self._pending.pop(number, None)) is None:
+                return
+            await self.process_locked(pull_request)
+
+    async def process_locked(self, pull_request: dict):
+        """self._lock을 잡은 상태에서 부른다"""
+        report_date = DateUtil.get_pending_report_date(self.report_hour)
+        try:
+            result = await asyncio.to_thread(self.process_pull_request, pull_request, report_date)
+            self.results[pull_request.get("number")] = result
+            self.report_dates[pull_request.get("number")] = report_date.date()
+        except Exception as ex:
+            log.exception(ex)
+
+    def process_pull_request(self, pull_request: dict, report_date: datetime) -> MergePullRequestResult:
+        number = pull_request.get("number")
+        log.info(f"Processing pull request #{number}")
+        # 명단 파일이 바뀌었으면 다시 읽는다
+        Roster.reload()
+        files = list(self.fetcher.iter_pull_request_files(number))
+        parsed = PullRequestParser.parse_pull_request(pull_request, files)
+        # 정기 report에서 검사했을 때와 같은 결과가 나오도록 다음 report가 다룰 날짜를 기준으로 검사한다
+        validation = self.validator.get_validation_result([parsed], reference_date=report_date)[0]
+        return self.merger.merge_one(validation)
+
+    async def drain(self):
+        """대기 중인 이벤트를 바로 처리하고 끝날 때까지 기다린다"""
+        for number in list(self._timers):
+            self._timers.pop(number).cancel()
+            self._start(number)
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    def is_outdated(self, pull_request: dict, report_date: date) -> bool:
+        number = pull_request.get("number")
+        if (result := self.results.get(number)) is None:
+            return True
+        head_sha = (pull_request.get("head") or {}).get("sha", "")
+        return result.validation.pull_request.head_sha != head_sha or self.report_dates.get(number) != report_date
+
+    async def reconcile(self):
+        """열린 PR 목록에 맞춰 결과를 채우고, webhook 없이 닫힌 PR의 결과는 버린다"""
+        pull_requests = await asyncio.to_thread(lambda: list(self.fetcher.iter_pull_requests()))
+        report_date = DateUtil.get_pending_report_date(self.report_hour).date()
+        async with self._lock:
+            open_numbers = {p.get("number") for p in pull_requests}
+            for number in [n for n in self.results if n not in open_numbers]:
+                self.forget(number)
+            outdated = [p for p in pull_requests if self.is_outdated(p, report_date)]
+            if outdated:
+                log.info(f"Reconciling {len(outdated)} open pull requests without an up-to-date result")
+            for pull_request in outdated:
+                await self.process_locked(pull_request)
+
+    def build_report(self) -> List[str]:
+        results = [self.results[number] for number in sorted(self.results)]
+        return self.message_builder.build_report(merge_pull_request_results=results)
+
+    async def handle_results(self, request: web.Request) -> web.Response:
+        return web.json_response([
+            {
+                "number": number,
+                "validation_result": result.validation.validation_result,
+                "merged": result.merge.merged,
+                "reasons": [d.reason for d in result.validation.validation_details if not d.result],
+                "message": result.merge.message,
+            }
+            for number, result in sorted(self.results.items())
+        ])
+
+    async def report(self) -> List[str]:
+        await self.drain()
+        await self.reconcile()
+        async with self._lock:
+            report = self.build_report()
+            await asyncio.to_thread(self.notify, report)
+            for number in [n for n, result in self.results.items() if result.merge.merged]:
+                self.results.pop(number)
+                self.report_dates.pop(number, None)
+        return report
+
+    async def handle_report(self, request: web.Request) -> web.Response:
+        return web.json_response(await self.report())
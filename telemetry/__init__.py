@@ -0,0 +1 @@
+from .metrics import MetricsRegistry, Histogram, Span, STAGE_SECONDS, HTTP_REQUEST_SECONDS, RATELIMIT_WAIT_SECONDS, RATELIMIT_REMAINING
\ No newline at end of file
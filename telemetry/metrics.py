@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Tuple
+
+# 초 단위. 한 번의 API 호출(수십 ms)부터 rate limit 대기가 섞인 단계(수 분)까지 담을 수 있게 잡는다
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = "gwichanhub_stage_seconds"
+HTTP_REQUEST_SECONDS = "gwichanhub_http_request_seconds"
+RATELIMIT_WAIT_SECONDS = "gwichanhub_ratelimit_wait_seconds"
+RATELIMIT_REMAINING = "gwichanhub_ratelimit_remaining"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """누적하지 않은 bucket별 개수를 저장하고 내보낼 때 누적한다"""
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        result = []
+        for bound, count in zip((*map(str, self.buckets), "+Inf"), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """q 분위수가 들어있는 bucket의 상한. 마지막 bucket이면 관측된 최댓값을 반환"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "buckets": dict(self.cumulative())
+        }
+
+@dataclass
+class MetricFamily:
+    name: str
+    help: str
+    type: str  # histogram | gauge
+    series: Dict[Labels, "Histogram | float"]
+
+@dataclass
+class Span:
+    name: str
+    start: float    # 실행 시작 후 경과 시간(초)
+    seconds: float
+    error: str | None = None
+
+def format_labels(labels: Labels, extra: str = "") -> str:
+    pairs = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class MetricsRegistry:
+    """한 번의 실행 동안 측정한 값을 모아서 JSON / Prometheus textfile로 내보낸다.
+
+    HttpTransport처럼 shared()로 실행 전체가 하나의 registry를 공유한다.
+    """
+    _shared: "MetricsRegistry | None" = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self.families: Dict[str, MetricFamily] = {}
+        self.spans: List[Span] = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.histogram(STAGE_SECONDS, "Duration of each pipeline stage")
+        self.histogram(HTTP_REQUEST_SECONDS, "Latency of HTTP calls including retries")
+        self.histogram(RATELIMIT_WAIT_SECONDS, "Time spent waiting for the rate limiter")
+        self.gauge(RATELIMIT_REMAINING, "Last observed X-RateLimit-Remaining")
+
+    @classmethod
+    def shared(cls) -> "MetricsRegistry":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def histogram(self, name: str, help: str) -> MetricFamily:
+        return self.families.setdefault(name, MetricFamily(name, help, "histogram", {}))
+
+    def gauge(self, name: str, help: str) -> MetricFamily:
+        return self.families.setdefault(name, MetricFamily(name, help, "gauge", {}))
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self.families[name].series
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    def set(self, name: str, value: float, **labels: str):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            self.families[name].series[key] = float(value)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """with 블록의 실행 시간을 stage 라벨로 기록한다. 예외가 나도 기록한다."""
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as ex:
+            error = type(ex).__name__
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe(STAGE_SECONDS, seconds, stage=name)
+            with self._lock:
+                self.spans.append(Span(name, start - self.started, seconds, error))
+
+    def merged(self, name: str) -> Histogram:
+        """라벨과 상관없이 합친 histogram"""
+        merged = Histogram()
+        with self._lock:
+            histograms = list(self.families[name].series.values())
+        for h in histograms:
+            merged.counts = [a + b for a, b in zip(merged.counts, h.counts)]
+            merged.count += h.count
+            merged.sum += h.sum
+            merged.max = max(merged.max, h.max)
+        return merged
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "elapsed_seconds": time.perf_counter() - self.started,
+                "spans": [asdict(s) for s in self.spans],
+                "metrics": {
+                    f.name: [
+                        {"labels": dict(labels), "value": v.to_dict() if isinstance(v, Histogram) else v}
+                        for labels, v in f.series.items()
+                    ]
+                    for f in self.families.values()
+                }
+            }
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for f in self.families.values():
+                lines.append(f"# HELP {f.name} {f.help}")
+                lines.append(f"# TYPE {f.name} {f.type}")
+                for labels, v in f.series.items():
+                    if isinstance(v, Histogram):
+                        for bound, count in v.cumulative():
+                            le = f'le="{bound}"'
+                            lines.append(f"{f.name}_bucket{format_labels(labels, le)} {count}")
+                        lines.append(f"{f.name}_sum{format_labels(labels)} {v.sum}")
+                        lines.append(f"{f.name}_count{format_labels(labels)} {v.count}")
+                    else:
+                        lines.append(f"{f.name}{format_labels(labels)} {v}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """테스트 채널 보고서에 붙이는 짧은 요약"""
+        stages = " | ".join(f"{s.name} {s.seconds:.2f}s" + (" (error)" if s.error else "") for s in self.spans)
+        http = self.merged(HTTP_REQUEST_SECONDS)
+        wait = self.merged(RATELIMIT_WAIT_SECONDS)
+        remaining = self.families[RATELIMIT_REMAINING].series
+        text = f"<Timing> total {time.perf_counter() - self.started:.2f}s\n{stages}\n"
+        text += f"HTTP {http.count} calls, p50 {http.quantile(0.5):.2f}s, p95 {http.quantile(0.95):.2f}s, max {http.max:.2f}s\n"
+        text += f"Rate limit wait {wait.sum:.2f}s"
+        if remaining:
+            text += f", remaining {int(min(remaining.values()))}"
+        return f"```md\n{text}```"
+
+    def export(self, json_path: str | None = None, prometheus_path: str | None = None):
+        """Prometheus node_exporter의 textfile collector가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓰고 교체한다"""
+        if json_path:
+            write_atomic(json_path, json.dumps(self.to_dict(), indent=2))
+        if prometheus_path:
+            write_atomic(prometheus_path, self.to_prometheus())
+
+def write_atomic(path: str, content: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp, path)
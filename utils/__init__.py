@@ -1,3 +1,8 @@
-from .discord_message_builder import DiscordMessageBuilder
-from .date_util import DateUtil
-from .file_util import FileUtil
\ No newline at end of file
+from .lazy_module import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "DiscordMessageBuilder": ".discord_message_builder",
+    "DateUtil": ".date_util",
+    "FileUtil": ".file_util",
+    "Roster": ".roster",
+})
\ No newline at end of file
@@ -23,6 +23,12 @@ class DateUtil:
         weeknum = DateUtil.get_weeknumber_from_startdate(t)
         return f'({weeknum}주차) {t.strftime("%y년 %m월 %d일")} {date_map[t.weekday()]}'    
     
+    @staticmethod
+    def get_pending_report_date(report_hour: int = 9) -> datetime:
+        """다음 정기 report가 다루게 될 날짜. report 시각 이전이면 어제, 이후면 오늘"""
+        now = datetime.now().astimezone(pytz.timezone('Asia/Seoul'))
+        return now - timedelta(days = 1) if now.hour < report_hour else now
+    
     @staticmethod
     def to_full_date(date: datetime):
         return datetime.strftime(date, "%Y-%m-%d %H:%M:%S")
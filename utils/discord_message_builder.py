@@ -2,7 +2,7 @@ from typing import List
 from pydantic import BaseModel
 from models import MergePullRequestResult, PullRequest, MessageType
 from .date_util import DateUtil
-from configs import settings
+from .roster import Roster
 class ResultCase(BaseModel):
     total: int
     successful: List = []
@@ -29,11 +29,9 @@ class DiscordMessageBuilder:
             total=len(merge_pull_request_results)
         )
         
-        found_id = set()
+        roster = Roster.shared()
         for result in merge_pull_request_results:
-            found_id.add(result.validation.pull_request.user_id.lower())
-            
-            name = settings.github.get_name_from_id(result.validation.pull_request.user_id)
+            name = roster.name(result.validation.pull_request.user_id)
             if result.merge.merged:
                 result_case.successful.append(name)
 
@@ -42,11 +40,9 @@ class DiscordMessageBuilder:
             else:
                 result_case.failed.append(name)
 
-        result_case.notFound = [
-            settings.github.get_name_from_id(id) 
-            for id in settings.github.id_map
-            if id not in found_id
-        ]
+        result_case.notFound = roster.not_submitted(
+            result.validation.pull_request.user_id for result in merge_pull_request_results
+        )
 
         return result_case
     
@@ -70,7 +66,7 @@ class DiscordMessageBuilder:
         return header
     
     def format_pr_header(self, pull_request: PullRequest, text):
-        return f"""<PR #{pull_request.number} "{pull_request.title}" by {settings.github.get_name_from_id(pull_request.user_id)}>\n{text}"""
+        return f"""<PR #{pull_request.number} "{pull_request.title}" by {Roster.shared().name(pull_request.user_id)}>\n{text}"""
     
     def build_message_from_result(self, msg_type: MessageType, result: MergePullRequestResult) -> str:
         text = ''
@@ -1,33 +1,52 @@
-from typing import List
+import re
+import sys
+from functools import lru_cache
+from typing import List, Tuple
 
-from models import CommitFile
+from models import CommitFile, CommitFileBatch
 from configs import settings
 class FileUtil:
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def path_pattern(num_prefix: str) -> re.Pattern:
+        """파일 목록을 줄바꿈으로 이은 문자열에서 한 줄(파일 경로 하나)씩 분해하는 정규식.
+        확장자는 마지막 `.` 뒤의 문자열이고, `.`으로 시작하는 파일명(ex. `.gitignore`)은 확장자가 없다.
+        없는 것과 빈 문자열을 구분할 수 있도록 dir은 끝의 `/`를, ext는 앞의 `.`을 포함해서 잡는다.
+        """
+        return re.compile(
+            r"^(?P<dir>[^\n]*/)?"
+            rf"(?P<prefix>{re.escape(num_prefix)})?"
+            r"(?P<name>[^/.\n][^/\n]*?|\.[^/\n]*|)"
+            r"(?P<ext>\.[^./\n]*)?$",
+            re.MULTILINE
+        )
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def split_directory(directory: str) -> Tuple[str, ...]:
+        """같은 폴더에 있는 파일들이 같은 path 객체를 공유하도록 캐시한다"""
+        return tuple(sys.intern(d) for d in directory[:-1].split('/')) if directory else ()
+    
+    @staticmethod
+    def tokenize(files: List[str]) -> CommitFileBatch:
+        """파일 경로 목록을 정규식 한 번으로 분해해서 열 단위로 반환"""
+        if not files:
+            return CommitFileBatch()
+        if any('\n' in f for f in files):
+            raise ValueError("File path should not contain a newline")
+        
+        pattern = FileUtil.path_pattern(settings.validator.FILENAME_WITH_NUMBER_PREFIX)
+        directories, prefixes, filenames, extensions = zip(*pattern.findall("\n".join(files)))
+        return CommitFileBatch(
+            paths=tuple(map(FileUtil.split_directory, directories)),
+            prefixes=prefixes,
+            filenames=filenames,
+            extensions=tuple(e[1:] if e else None for e in extensions)
+        )
+    
     @staticmethod
     def parse_files(files: List[str]) -> List[CommitFile]:
-        filenames = []
-        num_prefix = settings.validator.FILENAME_WITH_NUMBER_PREFIX
-        for f in files:
-            prefix = ""
-            f_split = f.split('/')
-            filename = f_split[-1]
-            if filename.startswith(num_prefix):
-                filename = filename[len(num_prefix):]
-                prefix = num_prefix
-            path = f_split[:-1]
-            extension = None
-            if '.' in filename and filename[0] != ".":
-                filename, extension = filename.split('.')
-
-            filenames.append(
-                CommitFile(
-                    path=path,
-                    filename=filename,
-                    extension=extension,
-                    prefix=prefix
-                )
-            )
-        return filenames
+        return list(FileUtil.tokenize(files))
     
     @staticmethod
     def format_content(files: List[CommitFile]):
@@ -0,0 +1,20 @@
+from importlib import import_module
+from typing import Callable, Dict, List, Tuple
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable, Callable, List[str]]:
+    """패키지의 __getattr__ / __dir__ / __all__ 을 만든다.
+
+    `from package import Name` 을 처음 할 때 exports[Name] 모듈만 import 하므로
+    aiohttp, discord 처럼 무거운 의존성은 실제로 사용하는 명령에서만 불러온다.
+    """
+    def __getattr__(name: str):
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(import_module(exports[name], package), name)
+        setattr(import_module(package), name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(exports)
+
+    return __getattr__, __dir__, list(exports)
@@ -0,0 +1,91 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterable, List, Tuple
+from configs import settings
+log = logging.getLogger(__name__)
+
+class Roster:
+    """Github 아이디 → 이름, 이름 → Github 아이디 색인.
+
+    settings.github.get_name_from_id는 부를 때마다 id_map 전체를 대소문자 없이 비교하므로
+    실행마다 한 번 casefold 한 아이디로 색인을 만들어두고 검사와 보고서 생성에서 같이 사용한다.
+    path의 JSON 파일({"github_id": "이름"})이 있으면 settings.github.id_map 대신 그 파일을 읽는다.
+    상주 모드에서는 reload()로 파일이 바뀌었을 때만 다시 읽는다.
+    """
+    path: str | None = '/usr/share/gwichanhub/roster.json'
+    _shared: "Roster | None" = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, id_map: Dict[str, str], source: Tuple = ()):
+        self.id_map = dict(id_map)
+        self.names: Dict[str, str] = {user_id.casefold(): name for user_id, name in self.id_map.items()}
+        self.ids: Dict[str, str] = {name: user_id for user_id, name in self.id_map.items()}
+        # 미제출 인원은 이 집합과 PR을 올린 아이디 집합의 차집합이다
+        self.folded_ids = frozenset(self.names)
+        self.version = hashlib.sha256(
+            json.dumps(sorted(self.names.items()), ensure_ascii=False).encode()
+        ).hexdigest()
+        # 다시 읽어야 하는지 판단하는 값. 파일이면 (경로, 수정 시각), settings면 (id(id_map),)
+        self.source = source
+
+    @classmethod
+    def load(cls, path: str) -> "Roster":
+        mtime = os.stat(path).st_mtime_ns
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f), (path, mtime))
+
+    @classmethod
+    def from_settings(cls) -> "Roster":
+        return cls(settings.github.id_map, (id(settings.github.id_map),))
+
+    @classmethod
+    def current_source(cls) -> Tuple:
+        if cls.path:
+            try:
+                return (cls.path, os.stat(cls.path).st_mtime_ns)
+            except FileNotFoundError:
+                pass
+        return (id(settings.github.id_map),)
+
+    @classmethod
+    def build(cls) -> "Roster":
+        if cls.path and os.path.exists(cls.path):
+            return cls.load(cls.path)
+        return cls.from_settings()
+
+    @classmethod
+    def shared(cls) -> "Roster":
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls.build()
+        return cls._shared
+
+    @classmethod
+    def reload(cls) -> bool:
+        """파일이 바뀌었거나 settings.update()로 id_map이 바뀌었으면 색인을 다시 만든다. 다시 만들었으면 True"""
+        with cls._shared_lock:
+            if cls._shared is not None and cls._shared.source == cls.current_source():
+                return False
+            try:
+                cls._shared = cls.build()
+            except (OSError, ValueError) as ex:
+                # 파일을 쓰는 중이거나 잘못된 JSON이면 이전 색인을 계속 사용한다
+                log.warning(f"Failed to reload roster: {ex!r}")
+                return False
+            log.info(f"Roster reloaded ({len(cls._shared.id_map)} users)")
+            return True
+
+    def name(self, user_id: str) -> str | None:
+        return self.names.get(user_id.casefold())
+
+    def user_id(self, name: str) -> str | None:
+        return self.ids.get(name)
+
+    def not_submitted(self, user_ids: Iterable[str]) -> List[str]:
+        """user_ids에 없는 사람의 이름. 보고서마다 순서가 같도록 id_map 순서를 따른다"""
+        submitted = self.folded_ids.intersection(u.casefold() for u in user_ids)
+        return [name for user_id, name in self.id_map.items() if user_id.casefold() not in submitted]